@@ -0,0 +1,87 @@
+"""
+Command line entry point for MaximalTriangle.howMany (see problem.md).
+
+    python -m polygons howMany N Z
+    python -m polygons howMany < pairs.txt   # one "n z" pair per line
+    python -m polygons range N_MIN N_MAX Z
+
+Only argparse is imported up front. polygon.py is imported when a command
+runs, its area and Catalan tables are built on the first count, and the store
+is only imported when --store is given.
+"""
+
+import argparse
+import os
+import sys
+from typing import Optional, TextIO
+
+# polygon.py and store.py are flat modules next to this file
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def open_store(path: Optional[str]):
+    if path is None:
+        return None
+    from store import ResultStore
+
+    return ResultStore(path)
+
+
+def how_many_batch(lines: TextIO, out: TextIO, store=None) -> None:
+    """
+    answers every "n z" line as soon as it is read
+    """
+    from polygon import how_many
+
+    for line in lines:
+        if not line.strip():
+            continue
+        n, z = map(int, line.split())
+        out.write(f"{how_many(n, z, store)}\n")
+        out.flush()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m polygons")
+    parser.add_argument("--store", help="persistent result store to warm start from")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    how_many_parser = subparsers.add_parser(
+        "howMany", help="count for 1 n and z, or for every 'n z' line on stdin"
+    )
+    how_many_parser.add_argument("n", type=int, nargs="?")
+    how_many_parser.add_argument("z", type=int, nargs="?")
+
+    range_parser = subparsers.add_parser("range", help="count for every n in a range")
+    range_parser.add_argument("n_min", type=int)
+    range_parser.add_argument("n_max", type=int)
+    range_parser.add_argument("z", type=int)
+    range_parser.add_argument("--workers", type=int, default=1)
+
+    args = parser.parse_args(argv)
+    store = open_store(args.store)
+    try:
+        if args.command == "howMany":
+            if args.n is None:
+                how_many_batch(sys.stdin, sys.stdout, store)
+            elif args.z is None:
+                parser.error("howMany needs both N and Z")
+            else:
+                from polygon import how_many
+
+                print(how_many(args.n, args.z, store))
+        else:
+            from polygon import count_range
+
+            for n, count in count_range(
+                args.n_min, args.n_max, args.z, args.workers, store
+            ):
+                print(n, count, flush=True)
+    finally:
+        if store is not None:
+            store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
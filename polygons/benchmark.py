@@ -1,17 +1,40 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
 import time
-from polygon import MaxTriangleCounter, NPolygon
+import tracemalloc
+from typing import Callable, Optional
+from polygon import ENGINES, MaxTriangleCounter, NPolygon, Polygon, PolygonCache
 
 
-def benchmark(fn, samples: int = 1) -> list[float]:
+def benchmark(fn, samples: int = 1, warmup: int = 0) -> list[float]:
+    for _ in range(warmup):
+        fn()
     times = []
     for _ in range(samples):
-        t0 = time.time()
+        t0 = time.perf_counter()
         fn()
-        t1 = time.time()
+        t1 = time.perf_counter()
         times.append(t1 - t0)
     return times
 
 
+def peak_memory(fn) -> int:
+    """
+    peak bytes allocated by python while running fn
+    """
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
 def benchmark_with_cache():
     N = 11
     SAMPLES = 1
@@ -32,5 +55,202 @@ def benchmark_with_cache():
     print(f"No cached time: {sum(no_cache_times) / len(no_cache_times)}")
 
 
+class RotationScanCache(PolygonCache):
+    """
+    previous PolygonCache lookup that tries every rotation and reflection
+    """
+
+    def _scan(self, polygon: Polygon):
+        for p in [polygon, polygon.flip()]:
+            for v in p.vertices:
+                canon_form = (p.n_polygon.N, tuple(p.rotate(-v).edge_distances))
+                if canon_form in self._cache:
+                    return canon_form
+        return None
+
+    def __setitem__(self, polygon: Polygon, value) -> None:
+        canon_form = self._scan(polygon)
+        if canon_form is None:
+            canon_form = (polygon.n_polygon.N, tuple(polygon.edge_distances))
+        self._cache[canon_form] = value
+
+    def __getitem__(self, polygon: Polygon):
+        canon_form = self._scan(polygon)
+        if canon_form is None:
+            raise KeyError
+        return self._cache[canon_form]
+
+    def __contains__(self, polygon: Polygon) -> bool:
+        return self._scan(polygon) is not None
+
+
+def benchmark_cache_lookup():
+    N = 60
+    NUM_POLYGONS = 200
+    SAMPLES = 3
+    n_polygon = NPolygon(N)
+    polygons = [
+        Polygon(random.sample(range(N), random.randint(3, N // 2)), n_polygon)
+        for _ in range(NUM_POLYGONS)
+    ]
+    # half of the lookups hit a rotated/reflected copy, the other half miss
+    lookups = [p.flip().rotate(random.randint(0, N)) for p in polygons] + [
+        Polygon(random.sample(range(N), random.randint(3, N // 2)), n_polygon)
+        for _ in range(NUM_POLYGONS)
+    ]
+
+    print(f"Running cache lookup benchmark for {N} with {SAMPLES} samples")
+    for name, cache_cls in [
+        ("rotation scan", RotationScanCache),
+        ("canonical", PolygonCache),
+    ]:
+        cache = cache_cls()
+        for p in polygons:
+            cache[p] = 0
+
+        def lookup():
+            for p in lookups:
+                _ = p in cache
+
+        times = benchmark(lookup, SAMPLES)
+        print(f"{name} time: {sum(times) / len(times)}")
+
+
 def MTC(n, include_cache=True):
     return MaxTriangleCounter(NPolygon(n), include_cache)
+
+
+# Regression suite
+DEFAULT_NS = [8, 10, 12, 15, 20, 25, 30, 40]
+# interval and sweep never use the cache
+CACHED_ENGINES = ("recursive", "iterative")
+# solvers that blow up past some N
+MAX_N = {
+    ("recursive", False): 20,
+    ("old", False): 15,
+}
+
+
+def old_solver(N: int) -> Callable[[], object]:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "old"))
+    from polygon_old import PolygonProblem
+
+    return PolygonProblem(N).find_all_max_triangle_count
+
+
+def suite_cases(ns: list[int]) -> dict[str, Callable[[], object]]:
+    """
+    a fresh solver is built on every call so that caches don't carry over
+    between samples
+    """
+    cases = {}
+    for N in ns:
+        for engine in ENGINES:
+            cached = engine in CACHED_ENGINES
+            for include_cache in [True, False] if cached else [True]:
+                if N > MAX_N.get((engine, include_cache), N):
+                    continue
+                name = f"{engine}/cache={include_cache}" if cached else engine
+                cases[f"{name}/N={N}"] = (
+                    lambda N=N, engine=engine, include_cache=include_cache: (
+                        MaxTriangleCounter(
+                            NPolygon(N), include_cache, engine=engine
+                        ).get_all_max_triangle_counts()
+                    )
+                )
+        if N <= MAX_N[("old", False)]:
+            cases[f"old/cache=False/N={N}"] = lambda N=N: old_solver(N)()
+    return cases
+
+
+def run_suite(
+    ns: list[int], samples: int, warmup: int, pattern: Optional[str] = None
+) -> dict:
+    results = {}
+    for name, fn in suite_cases(ns).items():
+        if pattern is not None and pattern not in name:
+            continue
+        times = benchmark(fn, samples, warmup)
+        results[name] = {
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.mean(times),
+            "samples": times,
+            "peak_memory": peak_memory(fn),
+        }
+        print(
+            f"{name:40} median {results[name]['median']:.6f}s "
+            f"peak {results[name]['peak_memory'] / 1024:.0f}KiB"
+        )
+    return {
+        "meta": {
+            "python": sys.version,
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "samples": samples,
+            "warmup": warmup,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """
+    names of cases whose median time got slower than baseline by more than
+    threshold (0.1 is 10%)
+    """
+    slower = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["median"]
+        after = result["median"]
+        change = (after - before) / before if before else 0.0
+        flag = "SLOWER" if change > threshold else ""
+        print(f"{name:40} {before:.6f}s -> {after:.6f}s ({change:+.1%}) {flag}")
+        if change > threshold:
+            slower.append(name)
+    return slower
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="polygon solver benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the suite")
+    run_parser.add_argument("--output", "-o", help="write results to this json")
+    run_parser.add_argument("--n", type=int, nargs="+", default=DEFAULT_NS)
+    run_parser.add_argument("--samples", type=int, default=5)
+    run_parser.add_argument("--warmup", type=int, default=1)
+    run_parser.add_argument("--filter", help="only run cases containing this")
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="flag cases that are slower than a baseline"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        results = run_suite(args.n, args.samples, args.warmup, args.filter)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+        return 0
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        slower = compare(baseline, current, args.threshold)
+        if slower:
+            print(
+                f"{len(slower)} case(s) slower than baseline by > {args.threshold:.0%}"
+            )
+            return 1
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 import math
 from functools import cached_property
-from typing import Counter, Tuple
+from typing import Counter, Generator, Tuple
 
 
 def partition_polygon(idxs: list[int], vertices: list[int]) -> list[list[int]]:
@@ -91,6 +91,50 @@ class PolygonProblem(Utils):
                         ) * self.find_valid_count(max_area, p2, seen_partition)
             return count
 
+    def find_valid_count_iterative(
+        self, max_area: float, vertices: list[int], seen_partition: set[Tuple[int, int]]
+    ) -> int:
+        """
+        same as find_valid_count but every call is a generator frame on an
+        explicit stack, so the order of visiting partitions (and updating
+        seen_partition) is identical
+        """
+
+        def frame(vertices: list[int]) -> Generator[list[int], int, int]:
+            vertices.sort()
+            if len(vertices) < 3:
+                return 1
+            elif len(vertices) == 3:
+                area = self.get_triangle_area(vertices)
+                if not math.isclose(area, max_area) and area < max_area:
+                    return 1
+                else:
+                    return 0
+            count = 0
+            for i in range(len(vertices)):
+                for dist in range(2, len(vertices) - 1):  # exclude adjacent vertices
+                    j = (i + dist) % len(vertices)
+                    if (i, j) not in seen_partition:
+                        seen_partition.add((i, j))
+                        p1, p2 = partition_polygon([i, j], vertices)
+                        count1 = yield p1
+                        count2 = yield p2
+                        count += count1 * count2
+            return count
+
+        stack = [frame(vertices)]
+        result = None
+        while stack:
+            try:
+                sub_vertices = stack[-1].send(result)
+            except StopIteration as stop:
+                stack.pop()
+                result = stop.value
+                continue
+            stack.append(frame(sub_vertices))
+            result = None
+        return result
+
     def find_max_triangle_count(self, triangle: list[int]) -> int:
         max_area = self.get_triangle_area(triangle)
         p1, p2, p3 = partition_polygon(triangle, list(range(self.N)))
@@ -1,4 +1,5 @@
 from polygon_old import (
+    PolygonProblem,
     Utils,
 )
 import math
@@ -53,6 +54,19 @@ class TestUtils:
         assert math.isclose(hexagon.get_triangle_area([0, 3, 4]), math.sqrt(3) / 2)
 
 
+def test_find_valid_count_iterative():
+    for N in range(4, 9):
+        problem = PolygonProblem(N)
+        max_area = problem.get_triangle_area([0, 2, N // 2 + 1])
+        seen, seen_iterative = set(), set()
+        assert problem.find_valid_count(
+            max_area, list(range(N)), seen
+        ) == problem.find_valid_count_iterative(
+            max_area, list(range(N)), seen_iterative
+        )
+        assert seen == seen_iterative
+
+
 # def test_find_max_triangle_count_octogon():
 #     poly = PolygonProblem(8)
 #     assert poly.find_max_triangle_count([0, 2, 4]) == 4
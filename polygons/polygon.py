@@ -1,7 +1,15 @@
-from dataclasses import dataclass
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass, field, replace
+import heapq
 import math
+import time
 from functools import cached_property
-from typing import Any, Counter, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Counter, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from store import ResultStore
 
 
 @dataclass
@@ -45,17 +53,85 @@ class NPolygon:
         # law of cosine
         return math.sqrt((2 * self.R**2) - (2 * self.R**2 * math.cos(alpha)))
 
+    @cached_property
+    def sin_table(self) -> list[float]:
+        """
+        sin_table[g] is sin of the central angle spanned by g edges
+        """
+        return [math.sin(2 * math.pi * g / self.N) for g in range(self.N + 1)]
+
+    def get_gap_area(self, gaps: list[int]) -> float:
+        """
+        area of an inscribed polygon given the edge distances between its
+        adjacent vertices. Every edge is the base of an isosceles triangle with
+        the center, and the gap that goes over half way around contributes a
+        negative area since the center is then outside of the polygon.
+        """
+        sin_table = self.sin_table
+        return self.R**2 / 2 * sum(sin_table[g] for g in gaps)
+
     def get_triangle_area(self, vertices: list[int]) -> float:
         assert len(vertices) == 3
         assert all([n < self.N for n in vertices])
-        # heron's formula
-        d = [
-            self.get_distance(vertices[0], vertices[1]),
-            self.get_distance(vertices[0], vertices[2]),
-            self.get_distance(vertices[1], vertices[2]),
+        i, j, k = sorted(vertices)
+        return self.get_gap_area([j - i, k - j, self.N + i - k])
+
+    @cached_property
+    def _triangle_area_table(self) -> Tuple[dict, list[float]]:
+        areas = sorted(
+            (self.get_gap_area(gaps), gaps) for gaps in triangle_gaps(self.N)
+        )
+        ranks = {}
+        rank_areas = []
+        for area, gaps in areas:
+            if not rank_areas or not math.isclose(area, rank_areas[-1]):
+                rank_areas.append(area)
+            ranks[gaps] = len(rank_areas) - 1
+        return ranks, rank_areas
+
+    @property
+    def triangle_area_ranks(self) -> dict[Tuple[int, int, int], int]:
+        """
+        maps the sorted gaps of every triangle to the rank of its area. Areas
+        that are within floating point error of each other share a rank so
+        comparing ranks with < is the same as comparing areas with lt.
+        """
+        return self._triangle_area_table[0]
+
+    @property
+    def rank_areas(self) -> list[float]:
+        """
+        rank_areas[r] is the area of the smallest triangle with rank r
+        """
+        return self._triangle_area_table[1]
+
+    def get_triangle_area_rank(self, gaps: list[int]) -> int:
+        return self.triangle_area_ranks[tuple(sorted(gaps))]
+
+    @cached_property
+    def chord_triangle_ranks(self) -> list[list[int]]:
+        """
+        chord_triangle_ranks[d][m - 1] is the area rank of triangle [0, m, d]
+        for 1 <= m <= d // 2. The remaining apexes are mirror images. Ranks are
+        non-decreasing in m since the triangle grows as the apex approaches the
+        middle of the chord.
+        """
+        return [
+            [
+                self.get_triangle_area_rank([m, d - m, self.N - d])
+                for m in range(1, d // 2 + 1)
+            ]
+            for d in range(self.N)
+        ]
+
+    @cached_property
+    def chain_areas(self) -> list[float]:
+        """
+        chain_areas[d] is the area of the polygon made of vertices 0..d
+        """
+        return [0.0, 0.0] + [
+            self.get_gap_area([1] * d + [self.N - d]) for d in range(2, self.N)
         ]
-        s = sum(d) / 2
-        return math.sqrt(s * (s - d[0]) * (s - d[1]) * (s - d[2]))
 
 
 @dataclass(frozen=True)
@@ -141,152 +217,662 @@ class Polygon:
     def area(self) -> float:
         if len(self.vertices) < 3:
             return 0.0
-        elif len(self.vertices) == 3:
-            return self.n_polygon.get_triangle_area(self.vertices)
-        else:
-            p1, p2 = self.partition(self.vertices[0], self.vertices[2])
-            assert len(p1.vertices) == 3
-            return p1.area + p2.area
+        return self.n_polygon.get_gap_area(self.edge_distances)
+
+    @cached_property
+    def area_rank(self) -> int:
+        assert len(self.vertices) == 3
+        return self.n_polygon.get_triangle_area_rank(self.edge_distances)
 
     @property
     def num_vertices(self) -> int:
         return len(self.vertices)
 
+    def canonical_form(self) -> Tuple[int, Tuple[int, ...]]:
+        return (self.n_polygon.N, canonical_gaps(self.edge_distances))
+
+
+class Arc:
+    """
+    Lightweight polygon made of the consecutive vertices start, ..., start + gap
+    of a N regular polygon, i.e. the part cut off by the chord (start, start + gap).
+    Every sub-polygon the solver visits is an arc so this is used instead of
+    Polygon in the hot path. There is no validation.
+    """
+
+    __slots__ = ("start", "gap", "N")
+
+    def __init__(self, start: int, gap: int, N: int):
+        self.start = start
+        self.gap = gap
+        self.N = N
+
+    def __repr__(self) -> str:
+        return f"Arc(start={self.start}, gap={self.gap}, N={self.N})"
+
+    def canonical_form(self) -> Tuple[int, Tuple[int, ...]]:
+        # same as the canonical form of the equivalent Polygon. The smallest
+        # rotation starts with the run of unit edges.
+        return (self.N, (1,) * self.gap + (self.N - self.gap,))
+
+    def to_polygon(self, n_polygon: NPolygon) -> Polygon:
+        assert n_polygon.N == self.N
+        return Polygon(
+            [(self.start + i) % self.N for i in range(self.gap + 1)], n_polygon
+        )
+
 
 @dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
 class PolygonCache:
     """
-    cache for polygon that is translation/reflection invariant
+    cache for polygon that is translation/reflection invariant. If max_size is
+    set, the least recently used entries are evicted to stay within it.
     """
 
-    def __init__(self):
-        self._cache = dict()
+    def __init__(self, max_size: Optional[int] = None):
+        assert max_size is None or max_size > 0
+        self._cache = OrderedDict()
+        self.max_size = max_size
+        self.stats = CacheStats()
 
-    def _canon_form(self, p: Polygon):
-        return (p.n_polygon.N, tuple(p.edge_distances))
+    def _canon_form(self, p: Union[Polygon, "Arc"]):
+        return p.canonical_form()
 
     def __setitem__(self, polygon: Polygon, value) -> None:
-        for p in [polygon, polygon.flip()]:
-            for v in p.vertices:
-                # change the "start" for the polygon
-                canon_form = self._canon_form(p.rotate(-v))
-                if canon_form in self._cache:
-                    self._cache[canon_form] = value
-                    return None
-        self._cache[self._canon_form(polygon)] = value
+        canon_form = self._canon_form(polygon)
+        self._cache[canon_form] = value
+        if self.max_size is not None:
+            self._cache.move_to_end(canon_form)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+                self.stats.evictions += 1
 
     def __getitem__(self, polygon: Polygon) -> Any:
-        for p in [polygon, polygon.flip()]:
-            for v in p.vertices:
-                # change the "start" for the polygon
-                canon_form = self._canon_form(p.rotate(-v))
-                if canon_form in self._cache:
-                    return self._cache[canon_form]
-        raise KeyError
+        return self._cache[self._canon_form(polygon)]
 
     def __contains__(self, polygon: Polygon) -> bool:
-        try:
-            self[polygon]
-            return True
-        except KeyError:
-            return False
+        return self._canon_form(polygon) in self._cache
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, polygon: Polygon) -> Any:
+        """
+        returns None on a miss. Unlike __getitem__, this updates stats and
+        marks the entry as recently used.
+        """
+        canon_form = self._canon_form(polygon)
+        value = self._cache.get(canon_form)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+            if self.max_size is not None:
+                self._cache.move_to_end(canon_form)
+        return value
+
+
+class SharedPolygonCache(PolygonCache):
+    """
+    PolygonCache keyed by (area rank, polygon). Counts only depend on the
+    threshold through its rank so one cache can be shared by every candidate
+    triangle.
+    """
+
+    def _canon_form(self, key: Tuple[int, Union[Polygon, "Arc"]]):
+        rank, polygon = key
+        return (rank, polygon.canonical_form())
+
+
+@dataclass
+class SolverStats:
+    """
+    counters for MaxTriangleCounter. A search node is a sub-polygon whose count
+    is looked up or computed, and a pruned triangle is a triangle on a chord
+    that was skipped for being too large.
+    """
+
+    search_nodes: int = 0
+    catalan_shortcuts: int = 0
+    pruned_triangles: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    # wall time per candidate triangle keyed by its sorted gaps
+    triangle_times: dict[Tuple[int, int, int], float] = field(default_factory=dict)
+
+    def merge(self, that: "SolverStats") -> None:
+        self.search_nodes += that.search_nodes
+        self.catalan_shortcuts += that.catalan_shortcuts
+        self.pruned_triangles += that.pruned_triangles
+        self.cache_hits += that.cache_hits
+        self.cache_misses += that.cache_misses
+        self.triangle_times.update(that.triangle_times)
+
+    def to_dict(self) -> dict:
+        return {
+            "search_nodes": self.search_nodes,
+            "catalan_shortcuts": self.catalan_shortcuts,
+            "pruned_triangles": self.pruned_triangles,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "total_time": sum(self.triangle_times.values()),
+            "triangle_times": {
+                ",".join(map(str, gaps)): t for gaps, t in self.triangle_times.items()
+            },
+        }
+
+    def to_json(self, **kwargs) -> str:
+        import json
+
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+ENGINES = ("recursive", "iterative", "interval", "sweep")
+# more chunks than workers so that a worker that finishes early can pick up
+# more work
+CHUNKS_PER_WORKER = 4
 
 
 @dataclass
 class MaxTriangleCounter:
+    """
+    engine="recursive" searches over sub-polygons top down (see README.md).
+    engine="iterative" is the same search with an explicit stack.
+    engine="interval" runs a bottom-up DP over chords of the full polygon.
+    engine="sweep" is the interval engine reusing the DP across thresholds.
+
+    If modulus is set, all counts are returned modulo it.
+
+    The recursive engine shares one cache across all candidate triangles,
+    holding at most cache_size entries if set.
+
+    With workers > 1, candidate triangles are counted in a process pool. The
+    sweep engine carries its DP from one candidate to the next, so it is serial
+    and needs workers=1.
+
+    If stats is set, it collects counters and timings while counting.
+
+    If store is set, sub-polygon and candidate triangle counts are read from
+    and written to it so later runs can warm start.
+    """
+
     n_polygon: NPolygon
     include_cache: bool = True
+    engine: str = "recursive"
+    modulus: Optional[int] = None
+    cache_size: Optional[int] = None
+    workers: int = 1
+    stats: Optional[SolverStats] = None
+    store: Optional["ResultStore"] = None
+
+    def __post_init__(self):
+        assert self.engine in ENGINES
+        assert self.workers >= 1
+        assert self.engine != "sweep" or self.workers == 1
+        assert self.modulus is None or self.modulus >= 1
+        self.cache = SharedPolygonCache(self.cache_size) if self.include_cache else None
+
+    @cached_property
+    def _catalan_numbers(self) -> list[int]:
+        return catalan_numbers(self.n_polygon.N, self.modulus)
+
+    def _reduce(self, count: int) -> int:
+        return count if self.modulus is None else count % self.modulus
+
+    def _get_known_count(
+        self,
+        max_rank: int,
+        arc: Arc,
+        cache: Optional[SharedPolygonCache],
+    ) -> Optional[int]:
+        """
+        count of arc if it can be found without searching, otherwise None
+        """
+        stats = self.stats
+        if stats is not None:
+            stats.search_nodes += 1
+        if arc.gap < 2:
+            # a single edge
+            return 1
+        if cache is not None and arc.gap > 2:
+            count = cache.get((max_rank, arc))
+            if stats is not None:
+                if count is None:
+                    stats.cache_misses += 1
+                else:
+                    stats.cache_hits += 1
+            if count is not None:
+                return count
+        if self.store is not None and arc.gap > 2:
+            count = self.store.get_count(
+                arc.N, self.modulus, max_rank, arc.canonical_form()[1]
+            )
+            if count is not None:
+                if cache is not None:
+                    cache[(max_rank, arc)] = count
+                return count
+
+        if arc.gap == 2:
+            if self.n_polygon.chord_triangle_ranks[2][0] < max_rank:
+                return 1
+            else:
+                return 0
+        if lt(self.n_polygon.chain_areas[arc.gap], self.n_polygon.rank_areas[max_rank]):
+            # if the area of the polygon is < the max_area all triangulations are valid
+            if stats is not None:
+                stats.catalan_shortcuts += 1
+            return self._catalan_numbers[arc.gap - 1]
+        return None
+
+    def _save_count(
+        self,
+        max_rank: int,
+        arc: Arc,
+        cache: Optional[SharedPolygonCache],
+        count: int,
+    ) -> None:
+        if cache is not None:
+            cache[(max_rank, arc)] = count
+        if self.store is not None:
+            self.store.put_count(
+                arc.N, self.modulus, max_rank, arc.canonical_form()[1], count
+            )
 
     def _get_valid_combo_counts(
         self,
-        max_area: float,
-        polygon: Polygon,
-        cache: Optional[PolygonCache],
+        max_rank: int,
+        arc: Arc,
+        cache: Optional[SharedPolygonCache],
     ) -> int:
-        if polygon.num_vertices < 3:
-            return 1
-        if cache is not None and polygon in cache:
-            return cache[polygon]
+        count = self._get_known_count(max_rank, arc, cache)
+        if count is not None:
+            return count
+
+        chord_triangle_ranks = self.n_polygon.chord_triangle_ranks[arc.gap]
+        count = 0
+        # the chord is part of exactly 1 triangle, which has apex start + m and
+        # splits the arc in 2
+        for m in range(1, arc.gap):
+            if chord_triangle_ranks[min(m, arc.gap - m) - 1] < max_rank:
+                count += self._get_valid_combo_counts(
+                    max_rank, Arc(arc.start, m, arc.N), cache
+                ) * self._get_valid_combo_counts(
+                    max_rank, Arc((arc.start + m) % arc.N, arc.gap - m, arc.N), cache
+                )
+                if self.modulus is not None:
+                    count %= self.modulus
+            elif self.stats is not None:
+                self.stats.pruned_triangles += 1
+
+        self._save_count(max_rank, arc, cache, count)
+        return count
 
-        if polygon.num_vertices == 3:
-            triangle = polygon
-            if lt(triangle.area, max_area):
-                count = 1
+    def _get_valid_combo_counts_iterative(
+        self,
+        max_rank: int,
+        arc: Arc,
+        cache: Optional[SharedPolygonCache],
+    ) -> int:
+        """
+        same as _get_valid_combo_counts with an explicit stack instead of
+        recursion. An arc is pushed back under the arcs its valid triangles split
+        it into, and summed up once those are counted.
+        """
+        N = arc.N
+        # counts for this max_rank, which only depend on the gap of the arc
+        counts: dict[int, int] = {}
+        stack = [(arc, False)]
+        while stack:
+            sub_arc, expanded = stack.pop()
+            gap = sub_arc.gap
+            if gap in counts:
+                continue
+            chord_triangle_ranks = self.n_polygon.chord_triangle_ranks[gap]
+            if not expanded:
+                count = self._get_known_count(max_rank, sub_arc, cache)
+                if count is not None:
+                    counts[gap] = count
+                    continue
+                stack.append((sub_arc, True))
+                for m in range(1, gap):
+                    if chord_triangle_ranks[min(m, gap - m) - 1] < max_rank:
+                        for part in (
+                            Arc(sub_arc.start, m, N),
+                            Arc((sub_arc.start + m) % N, gap - m, N),
+                        ):
+                            if part.gap not in counts:
+                                stack.append((part, False))
+                    elif self.stats is not None:
+                        self.stats.pruned_triangles += 1
             else:
                 count = 0
+                for m in range(1, gap):
+                    if chord_triangle_ranks[min(m, gap - m) - 1] < max_rank:
+                        count += counts[m] * counts[gap - m]
+                count = self._reduce(count)
+                self._save_count(max_rank, sub_arc, cache, count)
+                counts[gap] = count
+        return counts[arc.gap]
+
+    def _get_chain_counts(self, max_rank: int, max_gap: int) -> list[int]:
+        """
+        counts[d] is the number of valid triangulations of the sub-polygon cut
+        off by a chord spanning d edges, i.e. vertices 0..d. Every sub-polygon
+        left over by a candidate triangle is such a chord, so its count only
+        depends on d.
+        """
+        max_area = self.n_polygon.rank_areas[max_rank]
+        chain_areas = self.n_polygon.chain_areas
+        chord_triangle_ranks = self.n_polygon.chord_triangle_ranks
+        counts = [1] * (max_gap + 1)
+        for d in range(2, max_gap + 1):
+            if lt(chain_areas[d], max_area):
+                # every triangulation is valid
+                counts[d] = self._catalan_numbers[d - 1]
+                if self.stats is not None:
+                    self.stats.catalan_shortcuts += 1
+                continue
+            n_valid = bisect_left(chord_triangle_ranks[d], max_rank)
+            counts[d] = self._get_chain_count(counts, d, n_valid)
+        return counts
+
+    def _get_chain_count(self, counts: list[int], d: int, n_valid: int) -> int:
+        """
+        count for the chord spanning d edges given the counts of shorter chords
+        """
+        # the triangle on the chord (0, d) has apex m. Areas shrink as the apex
+        # moves away from the middle, so valid apexes are m <= n_valid and
+        # their mirror images m >= d - n_valid.
+        if self.stats is not None:
+            self.stats.search_nodes += 1
+            self.stats.pruned_triangles += max(d - 1 - 2 * n_valid, 0)
+        if n_valid == d // 2:
+            count = sum(counts[m] * counts[d - m] for m in range(1, d))
         else:
-            if lt(polygon.area, max_area):
-                # if the area of the polygon is < the max_area all triangulations are valid
-                count = polygon.num_triangle_combos
-            else:
-                count = 0
-                # using a heuristic of the largest edge being most likely
-                # a triangle that disqualifies the rest of the search tree
-                i1 = argmax(polygon.edge_distances)
-                i2 = (i1 + 1) % polygon.num_vertices
-                # every edge vertex is part of exactly 1 triangle
-                for n in range(1, polygon.num_vertices - 1):
-                    i3 = (i2 + n) % polygon.num_vertices
-                    v1, v2, v3 = (
-                        polygon.vertices[i1],
-                        polygon.vertices[i2],
-                        polygon.vertices[i3],
-                    )
-                    triangle = Polygon([v1, v2, v3], self.n_polygon)
-                    if lt(triangle.area, max_area):
-                        p1, p2, p3 = self._get_paritions_minus_triangle(
-                            triangle, polygon
-                        )
-                        count += (
-                            self._get_valid_combo_counts(max_area, p1, cache)
-                            * self._get_valid_combo_counts(max_area, p2, cache)
-                            * self._get_valid_combo_counts(max_area, p3, cache)
-                        )
+            count = 2 * sum(counts[m] * counts[d - m] for m in range(1, n_valid + 1))
+        return self._reduce(count)
 
-                if cache is not None:
-                    assert polygon not in cache
-                    cache[polygon] = count
-        return count
+    def _get_interval_count(self, triangle: Polygon) -> int:
+        gaps = triangle.edge_distances
+        counts = self._get_chain_counts(triangle.area_rank, max(gaps))
+        return self._reduce(counts[gaps[0]] * counts[gaps[1]] * counts[gaps[2]])
 
-    def get_all_max_triangle_counts(self) -> Tuple[Counter, int]:
-        # without loss of generality, we pick 1 vertices to be 0
-        counts = Counter()
+    def get_gap_counts(self) -> dict[Tuple[int, int, int], int]:
+        """
+        count for every distinct triangle under rotation and reflection, keyed
+        by its sorted gaps
+        """
+        if self.engine == "sweep":
+            assert self.workers == 1
+            return self._get_gap_counts_sweep()
+        if self.workers > 1:
+            return self._get_gap_counts_parallel()
+        return dict(self._count_gaps(triangle_gaps(self.n_polygon.N)))
+
+    def _get_gap_counts_sweep(self) -> dict[Tuple[int, int, int], int]:
+        """
+        counts candidate triangles from smallest to largest while keeping the
+        chain counts of the interval engine up to date. Raising the threshold
+        only changes chords that gain a valid triangle (and the longer chords
+        built on top of them), so shorter chords are not recomputed.
+        """
+        n_polygon = self.n_polygon
+        N = n_polygon.N
+        ranks = n_polygon.triangle_area_ranks
+        chain_areas = n_polygon.chain_areas
+        chord_triangle_ranks = n_polygon.chord_triangle_ranks
+        # chords_by_rank[r] are the chords with a triangle of rank r
+        chords_by_rank = [[] for _ in n_polygon.rank_areas]
+        for d in range(2, N):
+            for r in sorted(set(chord_triangle_ranks[d])):
+                chords_by_rank[r].append(d)
+
+        counts = [1] * N
+        n_valid = [0] * N
+        # chords shorter than num_free are smaller than the max area
+        num_free = 2
+        # counts[: num_clean] are up to date
+        num_clean = 2
+        max_rank = 0
+        gap_counts = {}
+        for gaps in sorted(triangle_gaps(N), key=ranks.__getitem__):
+            count = self._get_stored_triangle_count(gaps)
+            if count is not None:
+                gap_counts[gaps] = count
+                continue
+            rank = ranks[gaps]
+            for r in range(max_rank, rank):
+                for d in chords_by_rank[r]:
+                    n_valid[d] = bisect_left(chord_triangle_ranks[d], rank)
+                    num_clean = min(num_clean, d)
+            max_rank = rank
+            max_area = n_polygon.rank_areas[rank]
+            while num_free < N and lt(chain_areas[num_free], max_area):
+                num_clean = min(num_clean, num_free)
+                num_free += 1
+
+            t0 = time.perf_counter()
+            for d in range(num_clean, gaps[2] + 1):
+                if d < num_free:
+                    counts[d] = self._catalan_numbers[d - 1]
+                    if self.stats is not None:
+                        self.stats.catalan_shortcuts += 1
+                else:
+                    counts[d] = self._get_chain_count(counts, d, n_valid[d])
+            num_clean = max(num_clean, gaps[2] + 1)
+            gap_counts[gaps] = self._reduce(
+                counts[gaps[0]] * counts[gaps[1]] * counts[gaps[2]]
+            )
+            self._put_stored_triangle_count(gaps, gap_counts[gaps])
+            if self.stats is not None:
+                self.stats.triangle_times[gaps] = time.perf_counter() - t0
+        return {gaps: gap_counts[gaps] for gaps in triangle_gaps(N)}
+
+    def _count_gaps(
+        self, all_gaps: Iterable[Tuple[int, int, int]]
+    ) -> list[Tuple[Tuple[int, int, int], int]]:
+        results = []
+        for gaps in all_gaps:
+            t0 = time.perf_counter()
+            count = self._get_stored_triangle_count(gaps)
+            if count is None:
+                a, b, _ = gaps
+                triangle = Polygon([0, a, a + b], self.n_polygon)
+                count = self.get_max_triangle_count(triangle)
+                self._put_stored_triangle_count(gaps, count)
+            results.append((gaps, count))
+            if self.stats is not None:
+                self.stats.triangle_times[gaps] = time.perf_counter() - t0
+        return results
+
+    def _get_stored_triangle_count(self, gaps: Tuple[int, int, int]) -> Optional[int]:
+        if self.store is None:
+            return None
+        return self.store.get_triangle_count(self.n_polygon.N, self.modulus, gaps)
+
+    def _put_stored_triangle_count(self, gaps: Tuple[int, int, int], count: int):
+        if self.store is not None:
+            self.store.put_triangle_count(self.n_polygon.N, self.modulus, gaps, count)
+
+    def _estimate_cost(self, gaps: Tuple[int, int, int]) -> int:
+        # the search over the largest gap dominates, and larger triangles
+        # admit more sub triangles so less of the search is pruned
+        return (self.n_polygon.get_triangle_area_rank(gaps) + 1) * max(gaps) ** 2
+
+    def _get_gap_counts_parallel(self) -> dict[Tuple[int, int, int], int]:
+        from concurrent.futures import ProcessPoolExecutor
+
+        all_gaps = list(triangle_gaps(self.n_polygon.N))
+        chunks = balanced_chunks(
+            all_gaps,
+            [self._estimate_cost(gaps) for gaps in all_gaps],
+            self.workers * CHUNKS_PER_WORKER,
+        )
+        with ProcessPoolExecutor(
+            self.workers,
+            initializer=_init_worker,
+            initargs=(replace(self, workers=1),),
+        ) as executor:
+            chunk_results = list(executor.map(_count_gaps_in_worker, chunks))
+        counts = {}
+        for results, stats in chunk_results:
+            counts.update(results)
+            if self.stats is not None:
+                self.stats.merge(stats)
+        # same insertion order as the serial path
+        return {gaps: counts[gaps] for gaps in all_gaps}
+
+    def get_all_max_triangle_counts(self) -> Tuple["TriangleCounts", int]:
+        # the count of a triangle only depends on its gaps so we only need to
+        # count 1 triangle per orbit under rotation and reflection.
         N = self.n_polygon.N
-        for j in range(1, N - 1):
-            for k in range(j + 1, N):
-                triangle = Polygon([0, j, k], self.n_polygon)
-                counts[triangle] = self.get_max_triangle_count(triangle)
-        # there is nothing special about the first vertex but we triple count
-        # since every triangle has 3 vertex.
-        total_count = sum(counts.values()) * N
-        assert total_count % 3 == 0
-        return counts, total_count // 3
+        gap_counts = self.get_gap_counts()
+        total_count = sum(
+            count * triangle_orbit_size(gaps, N) for gaps, count in gap_counts.items()
+        )
+        return TriangleCounts(self.n_polygon, gap_counts), self._reduce(total_count)
 
     def get_max_triangle_count(self, triangle: Polygon) -> int:
-        full_polygon = Polygon(list(range(self.n_polygon.N)), self.n_polygon)
-        p1, p2, p3 = self._get_paritions_minus_triangle(triangle, full_polygon)
-        if self.include_cache:
-            cache = PolygonCache()
+        if self.engine in ("interval", "sweep"):
+            return self._get_interval_count(triangle)
+        N = self.n_polygon.N
+        i, j, k = triangle.vertices
+        # every sub-polygon left over by the triangle is cut off by 1 of its sides
+        p1, p2, p3 = Arc(i, j - i, N), Arc(j, k - j, N), Arc(k, N - k + i, N)
+        if self.engine == "iterative":
+            get_count = self._get_valid_combo_counts_iterative
         else:
-            cache = None
-        return (
-            self._get_valid_combo_counts(triangle.area, p1, cache)
-            * self._get_valid_combo_counts(triangle.area, p2, cache)
-            * self._get_valid_combo_counts(triangle.area, p3, cache)
+            get_count = self._get_valid_combo_counts
+        count = (
+            get_count(triangle.area_rank, p1, self.cache)
+            * get_count(triangle.area_rank, p2, self.cache)
+            * get_count(triangle.area_rank, p3, self.cache)
         )
+        return self._reduce(count)
 
-    def _get_paritions_minus_triangle(
-        self, triangle: Polygon, polygon: Polygon
-    ) -> list[Polygon]:
-        assert len(triangle.vertices) == 3
-        assert all([i in polygon.vertices] for i in triangle.vertices)
-        i, j, k = triangle.vertices
-        p1, r1 = polygon.partition(i, j)
-        p2, r2 = r1.partition(j, k)
-        # remaining is the triangle
-        r3, p3 = r2.partition(i, k)
-        assert r3 == triangle
-        return [p1, p2, p3]
+
+# per process counter so that each worker keeps its own cache across chunks
+_worker_counter: Optional[MaxTriangleCounter] = None
+
+
+def _init_worker(counter: MaxTriangleCounter) -> None:
+    global _worker_counter
+    _worker_counter = counter
+
+
+def _count_gaps_in_worker(
+    all_gaps: list[Tuple[int, int, int]],
+) -> Tuple[list[Tuple[Tuple[int, int, int], int]], Optional[SolverStats]]:
+    assert _worker_counter is not None
+    if _worker_counter.stats is not None:
+        # only report the stats of this chunk
+        _worker_counter.stats = SolverStats()
+    return _worker_counter._count_gaps(all_gaps), _worker_counter.stats
+
+
+# per process store for count_range
+_worker_store: Optional["ResultStore"] = None
+
+
+def _init_range_worker(store: Optional["ResultStore"]) -> None:
+    global _worker_store
+    _worker_store = store
+
+
+def _how_many_in_worker(n: int, z: int) -> int:
+    return how_many(n, z, _worker_store)
+
+
+class TriangleCounts(Mapping):
+    """
+    count for every triangle with vertex 0, expanded lazily from the count per
+    distinct triangle. Use expand() to get a Counter.
+    """
+
+    def __init__(self, n_polygon: NPolygon, gap_counts: dict):
+        self.n_polygon = n_polygon
+        self.gap_counts = gap_counts
+
+    def __getitem__(self, triangle: Polygon) -> int:
+        return self.gap_counts[tuple(sorted(triangle.edge_distances))]
+
+    def __iter__(self) -> Iterator[Polygon]:
+        # without loss of generality, we pick 1 vertices to be 0
+        N = self.n_polygon.N
+        for j in range(1, N - 1):
+            for k in range(j + 1, N):
+                yield Polygon([0, j, k], self.n_polygon)
+
+    def __len__(self) -> int:
+        return (self.n_polygon.N - 1) * (self.n_polygon.N - 2) // 2
+
+    def expand(self) -> Counter:
+        return Counter(dict(self.items()))
+
+
+class MaximalTriangle:
+    """
+    entry point matching problem.md
+    """
+
+    def howMany(self, n: int, z: int) -> int:
+        return how_many(n, z)
+
+
+def how_many(n: int, z: int, store: Optional["ResultStore"] = None) -> int:
+    if store is not None:
+        count = store.get_answer(n, z)
+        if count is not None:
+            return count
+    counter = MaxTriangleCounter(NPolygon(n), engine="sweep", modulus=z, store=store)
+    _, count = counter.get_all_max_triangle_counts()
+    if store is not None:
+        store.put_answer(n, z, count)
+    return count
+
+
+def count_range(
+    n_min: int,
+    n_max: int,
+    z: int,
+    workers: int = 1,
+    store: Optional["ResultStore"] = None,
+) -> Iterator[Tuple[int, int]]:
+    """
+    yields (n, how_many(n, z)) for every n in [n_min, n_max]. With workers > 1
+    the n are counted in a process pool and yielded as they complete.
+    """
+    # shared by every n (and every worker if the pool forks)
+    catalan_numbers(n_max, z)
+    if workers == 1:
+        for n in range(n_min, n_max + 1):
+            yield n, how_many(n, z, store)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    # the store is opened once per worker rather than unpickled for every n
+    with ProcessPoolExecutor(
+        workers, initializer=_init_range_worker, initargs=(store,)
+    ) as executor:
+        # largest first since they dominate the run time
+        futures = {
+            executor.submit(_how_many_in_worker, n, z): n
+            for n in range(n_max, n_min - 1, -1)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
 
 
 # Random utils
@@ -300,13 +886,101 @@ def same_under_rotation(l1: list, l2: list):
     return False
 
 
+def least_rotation(l: list) -> int:
+    """
+    index of the lexicographically smallest rotation of l in O(len(l)) using
+    Booth's algorithm
+    """
+    n = len(l)
+    failure = [-1] * (2 * n)
+    k = 0
+    for j in range(1, 2 * n):
+        c = l[j % n]
+        i = failure[j - k - 1]
+        while i != -1 and c != l[(k + i + 1) % n]:
+            if c < l[(k + i + 1) % n]:
+                k = j - i - 1
+            i = failure[i]
+        if i == -1 and c != l[(k + i + 1) % n]:
+            if c < l[(k + i + 1) % n]:
+                k = j
+            failure[j - k] = -1
+        else:
+            failure[j - k] = i + 1
+    return k
+
+
+def canonical_gaps(gaps: list[int]) -> Tuple[int, ...]:
+    """
+    smallest rotation of the gaps or of the reversed gaps. Two polygons are the
+    same under rotation and reflection iff their canonical gaps are equal.
+    """
+    k = least_rotation(gaps)
+    forward = tuple(gaps[k:] + gaps[:k])
+    reverse = gaps[::-1]
+    k = least_rotation(reverse)
+    return min(forward, tuple(reverse[k:] + reverse[:k]))
+
+
+def triangle_gaps(N: int) -> Iterator[Tuple[int, int, int]]:
+    """
+    sorted gaps of every distinct triangle on a N regular polygon under
+    rotation and reflection
+    """
+    for a in range(1, N // 3 + 1):
+        for b in range(a, (N - a) // 2 + 1):
+            yield (a, b, N - a - b)
+
+
+def triangle_orbit_size(gaps: Tuple[int, int, int], N: int) -> int:
+    """
+    number of triangles on a N regular polygon with the given gaps. Each of the
+    N vertices starts 1 triangle per distinct ordering of the gaps, and every
+    triangle is seen from its 3 vertices.
+    """
+    num_distinct = len(set(gaps))
+    if num_distinct == 1:
+        return N // 3
+    elif num_distinct == 2:
+        return N
+    else:
+        return 2 * N
+
+
+def balanced_chunks(items: list, costs: list[int], num_chunks: int) -> list[list]:
+    """
+    split items into at most num_chunks chunks of similar total cost by
+    greedily giving the most expensive remaining item to the cheapest chunk.
+    Chunks are ordered from most to least expensive.
+    """
+    chunks = [(0, i, []) for i in range(min(num_chunks, len(items)))]
+    for idx in sorted(range(len(items)), key=lambda idx: -costs[idx]):
+        cost, i, chunk = heapq.heappop(chunks)
+        chunk.append(items[idx])
+        heapq.heappush(chunks, (cost + costs[idx], i, chunk))
+    return [chunk for _, _, chunk in sorted(chunks, key=lambda c: (-c[0], c[1]))]
+
+
 def catalan_number(n: int) -> int:
     return math.factorial(2 * n) // (math.factorial(n + 1) * math.factorial(n))
 
 
-def lt(n1: float, n2: float) -> bool:
-    return not math.isclose(n1, n2) and n1 < n2
+# catalan tables per modulus, extended as longer tables are requested
+_catalan_tables: dict[Optional[int], list[int]] = {}
 
 
-def argmax(l: list):
-    return max(range(len(l)), key=l.__getitem__)
+def catalan_numbers(n: int, modulus: Optional[int] = None) -> list[int]:
+    """
+    first n catalan numbers using C(k + 1) = sum(C(i) * C(k - i)). Unlike the
+    closed form this needs no division so it can be reduced modulo anything.
+    The table for each modulus is only built once per process.
+    """
+    catalans = _catalan_tables.setdefault(modulus, [1])
+    for k in range(len(catalans), n):
+        catalan = sum(catalans[i] * catalans[k - 1 - i] for i in range(k))
+        catalans.append(catalan if modulus is None else catalan % modulus)
+    return catalans[:n]
+
+
+def lt(n1: float, n2: float) -> bool:
+    return not math.isclose(n1, n2) and n1 < n2
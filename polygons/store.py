@@ -0,0 +1,196 @@
+import mmap
+import os
+import struct
+import zlib
+from typing import Optional, Tuple
+
+MAGIC = b"PLYSTORE"
+VERSION = 1
+HEADER = struct.Struct("<8sI")
+# length and crc32 of the payload that follows
+RECORD_HEADER = struct.Struct("<II")
+# kind, N, modulus (0 if exact), threshold rank, number of gaps
+KEY_HEADER = struct.Struct("<BIQiI")
+
+COUNT = 0
+ANSWER = 1
+TRIANGLE = 2
+
+Key = Tuple[int, int, int, int, Tuple[int, ...]]
+
+
+class ResultStore:
+    """
+    Append only file of solver results that survives between processes.
+
+    Sub-polygon counts are keyed by (N, modulus, area rank of the threshold,
+    canonical gaps of the polygon). Candidate triangle counts are keyed by
+    (N, modulus, sorted gaps of the triangle) and answers to how_many(n, z) by
+    (n, z). Area ranks are derived from floating point areas so a store should
+    only be shared between machines with the same float behaviour.
+
+    Every record carries its length and a crc32, and is appended to a file
+    opened with O_APPEND. A record that was cut short by a crash fails its
+    check when the file is opened again and is truncated away. Existing records
+    are read through a memory map. A file that is not empty and does not start
+    with a store header is left alone and raises ValueError.
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self._index: dict[Key, int] = {}
+        # values written since the file was mapped
+        self._written: dict[Key, int] = {}
+        self._mmap: Optional[mmap.mmap] = None
+        self._fd: Optional[int] = os.open(
+            path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644
+        )
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                self._write(HEADER.pack(MAGIC, VERSION))
+            self._load()
+        except BaseException:
+            self.close()
+            raise
+
+    def _load(self) -> None:
+        size = os.fstat(self._fd).st_size
+        if size < HEADER.size:
+            raise ValueError(f"{self.path} is not a result store")
+        self._mmap = mmap.mmap(self._fd, size, access=mmap.ACCESS_READ)
+        magic, version = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a result store")
+
+        offset = HEADER.size
+        while offset + RECORD_HEADER.size <= size:
+            length, crc = RECORD_HEADER.unpack_from(self._mmap, offset)
+            start = offset + RECORD_HEADER.size
+            end = start + length
+            if end > size or zlib.crc32(self._mmap[start:end]) != crc:
+                break
+            key, value_offset = _decode_key(self._mmap, start)
+            self._index[key] = value_offset
+            offset = end
+
+        if offset != size:
+            # partially written record from a crash
+            self._mmap.close()
+            os.ftruncate(self._fd, offset)
+            self._mmap = mmap.mmap(self._fd, offset, access=mmap.ACCESS_READ)
+
+    def _get(self, key: Key) -> Optional[int]:
+        if key in self._written:
+            return self._written[key]
+        value_offset = self._index.get(key)
+        if value_offset is None:
+            return None
+        assert self._mmap is not None
+        (length,) = struct.unpack_from("<I", self._mmap, value_offset)
+        start = value_offset + 4
+        return int.from_bytes(self._mmap[start : start + length], "little")
+
+    def _put(self, key: Key, value: int) -> None:
+        if self._get(key) == value:
+            return
+        assert self._fd is not None, "store is closed"
+        payload = _encode(key, value)
+        record = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        self._write(record)
+        if self.fsync:
+            os.fsync(self._fd)
+        self._written[key] = value
+
+    def _write(self, data: bytes) -> None:
+        # os.write may write less than it was given, e.g. when the disk fills up
+        assert self._fd is not None
+        view = memoryview(data)
+        while view:
+            written = os.write(self._fd, view)
+            if not written:
+                raise OSError(f"could not write to {self.path}")
+            view = view[written:]
+
+    def get_count(
+        self, N: int, modulus: Optional[int], rank: int, gaps: Tuple[int, ...]
+    ) -> Optional[int]:
+        return self._get((COUNT, N, modulus or 0, rank, tuple(gaps)))
+
+    def put_count(
+        self,
+        N: int,
+        modulus: Optional[int],
+        rank: int,
+        gaps: Tuple[int, ...],
+        count: int,
+    ) -> None:
+        self._put((COUNT, N, modulus or 0, rank, tuple(gaps)), count)
+
+    def get_triangle_count(
+        self, N: int, modulus: Optional[int], gaps: Tuple[int, int, int]
+    ) -> Optional[int]:
+        return self._get((TRIANGLE, N, modulus or 0, -1, tuple(gaps)))
+
+    def put_triangle_count(
+        self, N: int, modulus: Optional[int], gaps: Tuple[int, int, int], count: int
+    ) -> None:
+        self._put((TRIANGLE, N, modulus or 0, -1, tuple(gaps)), count)
+
+    def get_answer(self, n: int, z: int) -> Optional[int]:
+        return self._get((ANSWER, n, z, -1, ()))
+
+    def put_answer(self, n: int, z: int, answer: int) -> None:
+        self._put((ANSWER, n, z, -1, ()), answer)
+
+    def __len__(self) -> int:
+        return len(self._index.keys() | self._written.keys())
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __del__(self) -> None:
+        # copies unpickled in pool workers are never closed explicitly
+        if getattr(self, "_fd", None) is not None:
+            self.close()
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __getstate__(self) -> dict:
+        # process pool workers reopen the file instead of sharing descriptors
+        return {"path": self.path, "fsync": self.fsync}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["path"], state["fsync"])
+
+
+def _encode(key: Key, value: int) -> bytes:
+    kind, N, modulus, rank, gaps = key
+    value_bytes = value.to_bytes((value.bit_length() + 7) // 8, "little")
+    return b"".join(
+        [
+            KEY_HEADER.pack(kind, N, modulus, rank, len(gaps)),
+            struct.pack(f"<{len(gaps)}I", *gaps),
+            struct.pack("<I", len(value_bytes)),
+            value_bytes,
+        ]
+    )
+
+
+def _decode_key(buffer, offset: int) -> Tuple[Key, int]:
+    """
+    returns the key of the record payload at offset and the offset of its value
+    """
+    kind, N, modulus, rank, num_gaps = KEY_HEADER.unpack_from(buffer, offset)
+    offset += KEY_HEADER.size
+    gaps = struct.unpack_from(f"<{num_gaps}I", buffer, offset)
+    return (kind, N, modulus, rank, gaps), offset + 4 * num_gaps
@@ -1,10 +1,27 @@
+import json
+import math
+import os
 import pytest
 import random
+import subprocess
+import sys
 from polygon import (
+    Arc,
     Polygon,
     MaxTriangleCounter,
+    MaximalTriangle,
     NPolygon,
     PolygonCache,
+    SharedPolygonCache,
+    SolverStats,
+    balanced_chunks,
+    canonical_gaps,
+    count_range,
+    catalan_number,
+    catalan_numbers,
+    least_rotation,
+    triangle_gaps,
+    triangle_orbit_size,
 )
 
 
@@ -93,6 +110,131 @@ class TestMaxTriangleCounter:
         _, count = self.MTC(100).get_all_max_triangle_counts()
         assert count == 308571232
 
+    def test_parallel(self):
+        serial = self.MTC(12).get_all_max_triangle_counts()
+        counter = self.MTC(12)
+        counter.workers = 2
+        parallel = counter.get_all_max_triangle_counts()
+        assert parallel[1] == serial[1]
+        assert list(parallel[0].gap_counts.items()) == list(
+            serial[0].gap_counts.items()
+        )
+
+    def test_stats(self):
+        stats = SolverStats()
+        counter = self.MTC(12)
+        counter.stats = stats
+        counts, _ = counter.get_all_max_triangle_counts()
+        assert stats.search_nodes > 0
+        assert stats.pruned_triangles > 0
+        assert stats.triangle_times.keys() == counts.gap_counts.keys()
+        assert json.loads(stats.to_json())["search_nodes"] == stats.search_nodes
+
+
+class TestIterativeMaxTriangleCounter(TestMaxTriangleCounter):
+    def MTC(self, n: int, use_cache=True):
+        return MaxTriangleCounter(NPolygon(n), use_cache, engine="iterative")
+
+    def test_no_recursion(self):
+        triangle = P([0, 100, 200], 300)
+        expected = MaxTriangleCounter(
+            NPolygon(300), engine="interval"
+        ).get_max_triangle_count(triangle)
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(100)
+        try:
+            assert self.MTC(300, False).get_max_triangle_count(triangle) == expected
+        finally:
+            sys.setrecursionlimit(limit)
+
+
+class TestIntervalMaxTriangleCounter(TestMaxTriangleCounter):
+    def MTC(self, n: int, use_cache=True):
+        return MaxTriangleCounter(NPolygon(n), use_cache, engine="interval")
+
+    def test_get_all_100(self):
+        _, count = self.MTC(100).get_all_max_triangle_counts()
+        assert count % 987654321 == 308571232
+
+    def test_triangle_counts(self):
+        c = self.MTC(9)
+        counts, total = c.get_all_max_triangle_counts()
+        assert len(counts) == len(list(counts)) == 28
+        for triangle, count in counts.expand().items():
+            assert count == c.get_max_triangle_count(triangle)
+        assert sum(counts.values()) * 9 == total * 3
+
+    def test_matches_recursive(self):
+        for n in range(3, 12):
+            assert (
+                self.MTC(n).get_all_max_triangle_counts()
+                == MaxTriangleCounter(NPolygon(n)).get_all_max_triangle_counts()
+            )
+
+
+class TestSweepMaxTriangleCounter(TestIntervalMaxTriangleCounter):
+    def MTC(self, n: int, use_cache=True):
+        return MaxTriangleCounter(NPolygon(n), use_cache, engine="sweep")
+
+    def test_parallel(self):
+        with pytest.raises(AssertionError):
+            MaxTriangleCounter(NPolygon(12), engine="sweep", workers=2)
+
+    def test_matches_interval(self):
+        for n in [50, 61]:
+            assert (
+                self.MTC(n).get_gap_counts()
+                == MaxTriangleCounter(NPolygon(n), engine="interval").get_gap_counts()
+            )
+
+
+class TestHowMany:
+    """
+    examples from problem.md
+    """
+
+    def test_examples(self):
+        solver = MaximalTriangle()
+        assert solver.howMany(4, 1000000000) == 0
+        assert solver.howMany(5, 100) == 5
+        assert solver.howMany(6, 1000003) == 2
+        assert solver.howMany(10, 1000000000) == 1010
+        assert solver.howMany(15, 1000000000) == 714340
+        assert solver.howMany(100, 987654321) == 308571232
+
+    def test_small_modulus(self):
+        assert MaximalTriangle().howMany(15, 1) == 0
+        assert MaximalTriangle().howMany(15, 7) == 714340 % 7
+
+    def test_count_range(self):
+        expected = {n: MaximalTriangle().howMany(n, 1000) for n in range(3, 20)}
+        assert list(count_range(3, 19, 1000)) == sorted(expected.items())
+        assert dict(count_range(3, 19, 1000, workers=2)) == expected
+
+    def test_recursive_modulus(self):
+        counter = MaxTriangleCounter(NPolygon(10), modulus=7)
+        counts, count = counter.get_all_max_triangle_counts()
+        assert count == 1010 % 7
+        assert all(c < 7 for c in counts.values())
+
+    def test_command_line(self):
+        package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        def run(*args, stdin=None):
+            return subprocess.run(
+                [sys.executable, "-m", "polygons", *args],
+                input=stdin,
+                capture_output=True,
+                text=True,
+                cwd=package_dir,
+                check=True,
+            ).stdout
+
+        assert run("howMany", "10", "1000000000") == "1010\n"
+        pairs = "4 1000000000\n5 100\n6 1000003\n"
+        assert run("howMany", stdin=pairs) == "0\n5\n2\n"
+        assert run("range", "5", "6", "1000") == "5 5\n6 2\n"
+
 
 class TestPolygon:
     def test_rotate(self):
@@ -149,13 +291,26 @@ class TestPolygon:
         assert p.is_same(p.flip().rotate(random.randint(0, 100)))
 
     def test_area_segment(self):
-        pass
+        assert P([1, 3], 8).area == 0.0
 
     def test_area_triangle(self):
-        pass
+        assert math.isclose(P([0, 1, 2], 4).area, 0.5)
+        assert math.isclose(P([0, 2, 4], 6).area, 3 * math.sqrt(3) / 4)
+        assert math.isclose(P([0, 3, 4], 6).area, math.sqrt(3) / 2)
 
     def test_area_whole(self):
-        pass
+        assert math.isclose(P([0, 1, 2, 3], 4).area, 1)
+        # regular hexagon with unit sides
+        assert math.isclose(P(list(range(6)), 6).area, 3 * math.sqrt(3) / 2)
+        # the partitions of a polygon add up to the whole
+        p1, p2 = P([0, 2, 3, 5, 9], 10).partition(2, 9)
+        assert math.isclose(p1.area + p2.area, P([0, 2, 3, 5, 9], 10).area)
+
+    def test_area_rank(self):
+        # isosceles triangle is bigger than the obtuse triangles
+        assert P([0, 1, 3], 5).area_rank > P([0, 1, 2], 5).area_rank
+        assert P([0, 1, 3], 5).area_rank == P([4, 1, 2], 5).area_rank
+        assert P([0, 1, 3], 12).area_rank == P([0, 2, 3], 12).area_rank
 
     def test_triangle_combo(self):
         assert random_polygon(3, 10).num_triangle_combos == 1
@@ -164,6 +319,26 @@ class TestPolygon:
         assert random_polygon(6, 10).num_triangle_combos == 14
 
 
+def test_catalan_numbers():
+    assert catalan_numbers(20) == [catalan_number(n) for n in range(20)]
+    assert catalan_numbers(20, 1000) == [catalan_number(n) % 1000 for n in range(20)]
+
+
+class TestArc:
+    def test_to_polygon(self):
+        assert Arc(6, 3, 8).to_polygon(NPolygon(8)) == P([6, 7, 0, 1], 8)
+
+    def test_canonical_form(self):
+        for gap in range(1, 8):
+            arc = Arc(random.randint(0, 7), gap, 8)
+            assert arc.canonical_form() == arc.to_polygon(NPolygon(8)).canonical_form()
+
+    def test_shares_cache_with_polygon(self):
+        cache = SharedPolygonCache()
+        cache[(0, P([2, 3, 4, 5], 8))] = 1
+        assert cache.get((0, Arc(6, 3, 8))) == 1
+
+
 class TestNPolygon:
     """
     # I don't want to add this because it's pretty much the same logic as old/test_polygon_old.py
@@ -217,3 +392,71 @@ class TestPolygonCache:
 
         assert p.rotate(3) in cache
         assert p.flip() in cache
+
+    def test_canonical_form(self):
+        cache = PolygonCache()
+        p = random_polygon()
+        cache[p] = 0
+        cache[p.flip().rotate(random.randint(0, 100))] = 1
+        assert len(cache) == 1
+        assert cache[p] == 1
+
+
+def test_triangle_orbit_size():
+    for N in range(3, 20):
+        assert sum(triangle_orbit_size(gaps, N) for gaps in triangle_gaps(N)) == (
+            N * (N - 1) * (N - 2) // 6
+        )
+
+
+def test_balanced_chunks():
+    chunks = balanced_chunks(list("abcde"), [5, 4, 3, 2, 1], 2)
+    assert chunks == [["a", "d", "e"], ["b", "c"]]
+    assert balanced_chunks([1], [1], 4) == [[1]]
+
+
+def test_least_rotation():
+    assert least_rotation([1]) == 0
+    assert least_rotation([3, 1, 2]) == 1
+    assert least_rotation([2, 1, 2, 1, 1]) == 3
+    assert least_rotation([1, 1, 1]) == 0
+
+
+def test_canonical_gaps():
+    assert canonical_gaps([3, 1, 2]) == (1, 2, 3)
+    # reflection
+    assert canonical_gaps([2, 1, 3]) == (1, 2, 3)
+    assert canonical_gaps([3, 1, 2, 1]) == (1, 2, 1, 3)
+
+
+class TestSharedPolygonCache:
+    def test_keyed_by_rank(self):
+        cache = SharedPolygonCache()
+        p = random_polygon()
+        cache[(0, p)] = 0
+        cache[(1, p.flip())] = 1
+        assert cache.get((0, p.rotate(3))) == 0
+        assert cache.get((1, p)) == 1
+        assert cache.get((2, p)) is None
+        assert cache.stats.hits == 2
+        assert cache.stats.misses == 1
+
+    def test_lru_eviction(self):
+        cache = SharedPolygonCache(max_size=2)
+        p1, p2, p3 = P([0, 1, 2], 8), P([0, 1, 3], 8), P([0, 1, 4], 8)
+        cache[(0, p1)] = 1
+        cache[(0, p2)] = 2
+        # p1 is now more recently used than p2
+        assert cache.get((0, p1)) == 1
+        cache[(0, p3)] = 3
+        assert len(cache) == 2
+        assert cache.stats.evictions == 1
+        assert cache.get((0, p2)) is None
+        assert cache.get((0, p1)) == 1
+
+    def test_bounded_counter(self):
+        counter = MaxTriangleCounter(NPolygon(12), cache_size=10)
+        _, count = counter.get_all_max_triangle_counts()
+        assert count == 13316
+        assert len(counter.cache) <= 10
+        assert counter.cache.stats.evictions > 0
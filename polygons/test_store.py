@@ -0,0 +1,130 @@
+import os
+import pickle
+import pytest
+from polygon import MaxTriangleCounter, NPolygon, SolverStats, count_range, how_many
+from store import ResultStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "results.bin")
+
+
+class TestResultStore:
+    def test_round_trip(self, path):
+        with ResultStore(path) as store:
+            store.put_count(10, None, 3, (1, 1, 8), 2**100)
+            store.put_triangle_count(10, 7, (2, 3, 5), 4)
+            store.put_answer(10, 7, 2)
+            assert store.get_count(10, None, 3, (1, 1, 8)) == 2**100
+            assert store.get_count(10, None, 4, (1, 1, 8)) is None
+            assert store.get_triangle_count(10, 7, (2, 3, 5)) == 4
+            assert store.get_answer(10, 7) == 2
+
+        with ResultStore(path) as store:
+            assert len(store) == 3
+            assert store.get_count(10, None, 3, (1, 1, 8)) == 2**100
+            assert store.get_count(10, 7, 3, (1, 1, 8)) is None
+            assert store.get_answer(10, 7) == 2
+            assert store.get_answer(10, 8) is None
+
+    def test_zero(self, path):
+        with ResultStore(path) as store:
+            store.put_answer(4, 10, 0)
+        with ResultStore(path) as store:
+            assert store.get_answer(4, 10) == 0
+
+    def test_truncated_record(self, path):
+        with ResultStore(path) as store:
+            store.put_answer(5, 100, 5)
+            store.put_answer(6, 100, 2)
+        size = os.path.getsize(path)
+        with open(path, "r+b") as f:
+            f.truncate(size - 1)
+
+        with ResultStore(path) as store:
+            assert store.get_answer(5, 100) == 5
+            assert store.get_answer(6, 100) is None
+            store.put_answer(6, 100, 2)
+        with ResultStore(path) as store:
+            assert store.get_answer(6, 100) == 2
+
+    @pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+    def test_unpickled_copies_are_closed(self, path):
+        with ResultStore(path) as store:
+            store.put_answer(5, 100, 5)
+            num_fds = len(os.listdir("/proc/self/fd"))
+            for _ in range(20):
+                copy = pickle.loads(pickle.dumps(store))
+                assert copy.get_answer(5, 100) == 5
+                del copy
+            assert len(os.listdir("/proc/self/fd")) == num_fds
+            store.close()
+            store.close()
+
+    @pytest.mark.parametrize(
+        "contents", [b"something else entirely", b"notes", b"PLYSTORE\x02\0\0\0"]
+    )
+    def test_not_a_store(self, path, contents):
+        with open(path, "wb") as f:
+            f.write(contents)
+        with pytest.raises(ValueError):
+            ResultStore(path)
+        with open(path, "rb") as f:
+            assert f.read() == contents
+
+    def test_empty_file(self, path):
+        open(path, "wb").close()
+        with ResultStore(path) as store:
+            store.put_answer(5, 100, 5)
+        with ResultStore(path) as store:
+            assert store.get_answer(5, 100) == 5
+
+    def test_short_writes(self, path, monkeypatch):
+        write = os.write
+        monkeypatch.setattr(os, "write", lambda fd, data: write(fd, data[:3]))
+        with ResultStore(path) as store:
+            store.put_count(10, None, 3, (1, 1, 8), 2**100)
+            store.put_answer(5, 100, 5)
+        monkeypatch.undo()
+        with ResultStore(path) as store:
+            assert len(store) == 2
+            assert store.get_count(10, None, 3, (1, 1, 8)) == 2**100
+            assert store.get_answer(5, 100) == 5
+
+
+class TestWarmStart:
+    def test_recursive(self, path):
+        expected = MaxTriangleCounter(NPolygon(20)).get_gap_counts()
+        with ResultStore(path) as store:
+            counter = MaxTriangleCounter(NPolygon(20), store=store)
+            assert counter.get_gap_counts() == expected
+        with ResultStore(path) as store:
+            stats = SolverStats()
+            counter = MaxTriangleCounter(NPolygon(20), store=store, stats=stats)
+            assert counter.get_gap_counts() == expected
+            assert stats.search_nodes == 0
+
+    def test_parallel(self, path):
+        expected = MaxTriangleCounter(NPolygon(14)).get_gap_counts()
+        with ResultStore(path) as store:
+            counter = MaxTriangleCounter(NPolygon(14), store=store, workers=2)
+            assert counter.get_gap_counts() == expected
+        with ResultStore(path) as store:
+            for gaps, count in expected.items():
+                assert store.get_triangle_count(14, None, gaps) == count
+
+    def test_how_many(self, path):
+        with ResultStore(path) as store:
+            assert how_many(15, 1000000000, store) == 714340
+        with ResultStore(path) as store:
+            assert store.get_answer(15, 1000000000) == 714340
+            assert how_many(15, 1000000000, store) == 714340
+
+    def test_count_range(self, path):
+        expected = dict(count_range(5, 12, 1000))
+        with ResultStore(path) as store:
+            assert dict(count_range(5, 12, 1000, workers=2, store=store)) == expected
+        with ResultStore(path) as store:
+            for n, count in expected.items():
+                assert store.get_answer(n, 1000) == count
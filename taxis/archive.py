@@ -0,0 +1,103 @@
+import os
+from collections.abc import Iterator
+from typing import Optional
+
+import numpy as np
+
+from main import Trip
+
+COLUMNS = {
+    "id": np.int64,
+    "start": np.int32,
+    "end": np.int32,
+    "request_time": np.int64,
+    "start_time": np.int64,
+    "end_time": np.int64,
+    "real": np.bool_,
+}
+
+
+class TripArchive:
+    """
+    Completed trips stored as one NumPy array per column, filled a chunk at a
+    time. With spill_dir every full chunk is written there as .npy files and
+    read back memory mapped, so only the chunk being filled is held in memory.
+    """
+
+    def __init__(self, chunk_size: int = 1 << 16, spill_dir: Optional[str] = None):
+        self.chunk_size = chunk_size
+        self.spill_dir = spill_dir
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+        # full chunks, or their chunk number when spilled
+        self._chunks: list[dict[str, np.ndarray] | int] = []
+        self._buffer = self._new_chunk()
+        self._fill = 0
+
+    def _new_chunk(self) -> dict[str, np.ndarray]:
+        return {
+            name: np.empty(self.chunk_size, dtype) for name, dtype in COLUMNS.items()
+        }
+
+    def _path(self, chunk: int, name: str) -> str:
+        assert self.spill_dir is not None
+        return os.path.join(self.spill_dir, f"{chunk:06d}.{name}.npy")
+
+    def append(self, trip: Trip):
+        assert trip.start_time is not None and trip.end_time is not None
+        row = self._fill
+        buffer = self._buffer
+        buffer["id"][row] = trip.id
+        buffer["start"][row] = trip.start.id
+        buffer["end"][row] = trip.end.id
+        buffer["request_time"][row] = trip.request_time
+        buffer["start_time"][row] = trip.start_time
+        buffer["end_time"][row] = trip.end_time
+        buffer["real"][row] = trip.real
+        self._fill += 1
+        if self._fill == self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        if self.spill_dir is None:
+            self._chunks.append(self._buffer)
+            self._buffer = self._new_chunk()
+        else:
+            chunk = len(self._chunks)
+            for name, column in self._buffer.items():
+                np.save(self._path(chunk, name), column)
+            self._chunks.append(chunk)
+        self._fill = 0
+
+    def __len__(self) -> int:
+        return len(self._chunks) * self.chunk_size + self._fill
+
+    def chunks(self) -> Iterator[dict[str, np.ndarray]]:
+        """
+        yields the columns a chunk at a time, in the order trips were completed
+        """
+        for chunk in self._chunks:
+            if isinstance(chunk, int):
+                yield {
+                    name: np.load(self._path(chunk, name), mmap_mode="r")
+                    for name in COLUMNS
+                }
+            else:
+                yield chunk
+        if self._fill:
+            yield {name: column[: self._fill] for name, column in self._buffer.items()}
+
+    def column(self, name: str) -> np.ndarray:
+        parts = [chunk[name] for chunk in self.chunks()]
+        if not parts:
+            return np.empty(0, COLUMNS[name])
+        return np.concatenate(parts)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        bytes of column data held in memory
+        """
+        in_memory = sum(not isinstance(chunk, int) for chunk in self._chunks) + 1
+        row_size = sum(np.dtype(dtype).itemsize for dtype in COLUMNS.values())
+        return in_memory * row_size * self.chunk_size
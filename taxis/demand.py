@@ -0,0 +1,89 @@
+import gzip
+import json
+from collections.abc import Callable, Iterator
+from typing import Optional
+
+import numpy as np
+
+# (time, start node id, end node id)
+Request = tuple[int, int, int]
+
+
+def poisson_demand(
+    rates: np.ndarray,
+    profile: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+    batch_size: int = 1024,
+    seed: Optional[int] = None,
+    steps: Optional[int] = None,
+) -> Iterator[Request]:
+    """
+    Poisson arrivals with rates[start, end] requests per tick for each pair of
+    nodes, scaled by profile(ticks) (e.g. a daily cycle) if given. The random
+    numbers for batch_size ticks are drawn at once: the number of requests in
+    each tick, then the pair of every request.
+    """
+    rates = np.asarray(rates, dtype=float)
+    if rates.ndim != 2 or rates.shape[0] != rates.shape[1]:
+        raise ValueError(f"rates must be a square matrix, not of shape {rates.shape}")
+    if not np.isfinite(rates).all() or (rates < 0).any():
+        raise ValueError("rates must be finite and non-negative")
+    if rates.sum() == 0:
+        raise ValueError("rates are all 0, there would never be a request")
+    return _poisson_batches(rates, profile, batch_size, seed, steps)
+
+
+def _poisson_batches(
+    rates: np.ndarray,
+    profile: Optional[Callable[[np.ndarray], np.ndarray]],
+    batch_size: int,
+    seed: Optional[int],
+    steps: Optional[int],
+) -> Iterator[Request]:
+    num_nodes = rates.shape[0]
+    total = rates.sum()
+    pair_probabilities = (rates / total).ravel()
+    rng = np.random.default_rng(seed)
+    start = 0
+    while steps is None or start < steps:
+        end = start + batch_size if steps is None else min(start + batch_size, steps)
+        ticks = np.arange(start, end)
+        tick_rates = total * (profile(ticks) if profile is not None else 1.0)
+        counts = rng.poisson(np.broadcast_to(tick_rates, ticks.shape))
+        pairs = rng.choice(
+            num_nodes * num_nodes, size=counts.sum(), p=pair_probabilities
+        )
+        times = np.repeat(ticks, counts)
+        yield from zip(
+            times.tolist(), (pairs // num_nodes).tolist(), (pairs % num_nodes).tolist()
+        )
+        start = end
+
+
+def trace_demand(path: str) -> Iterator[Request]:
+    """
+    Replays recorded requests from a JSON lines file (gzipped if it ends in
+    .gz) of {"time": ..., "start": ..., "end": ...} objects in time order,
+    reading one line at a time.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    last_time = None
+    with opener(path, "rt") as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            time = record["time"]
+            if last_time is not None and time < last_time:
+                raise ValueError(f"{path}:{line_number} goes back in time")
+            last_time = time
+            yield time, record["start"], record["end"]
+
+
+def write_trace(path: str, requests: Iterator[Request]):
+    """
+    records requests in the format trace_demand reads
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wt") as file:
+        for time, start, end in requests:
+            file.write(json.dumps({"time": time, "start": start, "end": end}) + "\n")
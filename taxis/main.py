@@ -1,7 +1,17 @@
 import abc
+import heapq
 import random
+from collections import defaultdict, deque
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass, field
-from typing import Optional
+from itertools import islice
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from archive import TripArchive
+    from metrics import MetricsCollector
+    from network import Network
+    from profiler import Profiler
 
 
 TRAVEL_TIME = 5
@@ -10,12 +20,12 @@ NUM_PLANES = 10
 NUM_STEPS = 10000
 
 
-@dataclass
+@dataclass(slots=True)
 class Node:
     id: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Trip:
     id: int
     start: Node
@@ -30,34 +40,131 @@ class Trip:
         return self.end_time is None
 
 
-@dataclass
+@dataclass(slots=True)
 class Plane:
     curr_node: Node | None
     curr_trip: Trip | None = None
 
 
+# event kinds, arrivals sort before completions at the same time
+ARRIVAL = 0
+COMPLETION = 1
+
+
 @dataclass
 class Simulation(abc.ABC):
+    """
+    Event driven simulation. Trips in the air and requests scheduled ahead of
+    time are kept in a heap of (time, kind, id, ...) events and each visited
+    tick only touches the trips waiting for a plane and the events due at it.
+
+    request_trips and move_planes run on every tick unless next_request_time
+    says they can be skipped, in which case simulate jumps to the next event.
+
+    demand is an optional source of (time, start node id, end node id) real
+    requests in time order, see demand.py. It is read lazily, one request
+    ahead, and the hooks then only run at ticks where something happens.
+    """
+
     nodes: list[Node]
     planes: list[Plane]
-    trips: list[Trip] = field(default_factory=list)
+    # trips that have been requested and not completed, by id
+    trips: dict[int, Trip] = field(default_factory=dict)
     curr_time: int = 0
+    # completed trips are dropped unless there is an archive to move them to
+    archive: Optional["TripArchive"] = None
+    metrics: Optional["MetricsCollector"] = None
+    travel_time: int = TRAVEL_TIME
+    # travel times between nodes, instead of travel_time for every trip
+    network: Optional["Network"] = None
+    # the random module when None, so random.seed makes runs repeatable
+    rng: Optional[random.Random] = None
+    demand: Optional[Iterable[tuple[int, int, int]]] = None
+    profiler: Optional["Profiler"] = None
+    # bookkeeping, kept out of __init__ and repr
+    num_trips: int = field(default=0, init=False, repr=False)
+    # trips waiting for a plane by id, so iteration is in request order
+    pending: dict[int, Trip] = field(default_factory=dict, init=False, repr=False)
+    events: list[tuple] = field(default_factory=list, init=False, repr=False)
+    # pending trips by start node id in request order. Trips assigned out of
+    # order are left in place and skipped when they reach the front.
+    queues: dict[int, deque[Trip]] = field(
+        default_factory=lambda: defaultdict(deque), init=False, repr=False
+    )
+    # indexes into planes of the idle planes, overall and by node id
+    idle: set[int] = field(default_factory=set, init=False, repr=False)
+    idle_at: dict[int, set[int]] = field(
+        default_factory=lambda: defaultdict(set), init=False, repr=False
+    )
+    _num_scheduled: int = field(default=0, init=False, repr=False)
+    # node ids that gained a pending trip or an idle plane since assign_trips
+    _changed_nodes: set[int] = field(default_factory=set, init=False, repr=False)
+    _plane_index: dict[int, int] = field(default_factory=dict, init=False, repr=False)
+    _node_by_id: dict[int, Node] = field(default_factory=dict, init=False, repr=False)
+    _demand: Optional[Iterator[tuple[int, int, int]]] = field(
+        default=None, init=False, repr=False
+    )
+    _next_demand: Optional[tuple[int, int, int]] = field(
+        default=None, init=False, repr=False
+    )
+
+    def __post_init__(self):
+        self._node_by_id = {node.id: node for node in self.nodes}
+        if self.demand is not None:
+            self._demand = iter(self.demand)
+            self._next_demand = next(self._demand, None)
+        for i, plane in enumerate(self.planes):
+            self._plane_index[id(plane)] = i
+            if plane.curr_trip is None and plane.curr_node is not None:
+                self._add_idle(i, plane.curr_node)
+
+    def _add_idle(self, plane_index: int, node: Node):
+        self.idle.add(plane_index)
+        self.idle_at[node.id].add(plane_index)
+        self._changed_nodes.add(node.id)
+        if self.metrics is not None:
+            self.metrics.plane_idle(plane_index, self.curr_time)
 
     def _next_trip_id(self) -> int:
-        return 0 if not self.trips else self.trips[-1].id + 1
+        self.num_trips += 1
+        return self.num_trips - 1
+
+    def request_trip(self, start: Node, end: Node, real: bool) -> Trip:
+        trip = Trip(self._next_trip_id(), start, end, self.curr_time, real)
+        self.trips[trip.id] = trip
+        self.pending[trip.id] = trip
+        self.queues[start.id].append(trip)
+        self._changed_nodes.add(start.id)
+        return trip
 
-    def request_trip(self, start: Node, end: Node, real: bool):
-        self.trips.append(Trip(self._next_trip_id(), start, end, self.curr_time, real))
+    def schedule_trip(self, time: int, start: Node, end: Node, real: bool):
+        """
+        requests a trip at a later tick without waking up the hooks for it
+        """
+        if time <= self.curr_time:
+            self.request_trip(start, end, real)
+            return
+        heapq.heappush(
+            self.events, (time, ARRIVAL, self._num_scheduled, start, end, real)
+        )
+        self._num_scheduled += 1
 
     def assign_trip(self, trip: Trip, plane: Plane):
         assert trip.end_time is None
         assert plane.curr_node == trip.start
+        plane_index = self._plane_index[id(plane)]
+        self.idle.discard(plane_index)
+        self.idle_at[trip.start.id].discard(plane_index)
         plane.curr_node = None
         plane.curr_trip = trip
 
         trip.start_time = self.curr_time
-        trip.end_time = self.curr_time + TRAVEL_TIME
+        trip.end_time = self.curr_time + self.travel_time_between(trip.start, trip.end)
         trip.assigned_plane = plane
+        del self.pending[trip.id]
+        if self.metrics is not None:
+            self.metrics.trip_assigned(trip, plane_index, self.curr_time)
+        heapq.heappush(self.events, (trip.end_time, COMPLETION, trip.id, trip))
 
     def complete_trip(self, trip: Trip):
         assert trip.end_time == self.curr_time
@@ -65,27 +172,95 @@ class Simulation(abc.ABC):
         plane = trip.assigned_plane
         plane.curr_node = trip.end
         plane.curr_trip = None
+        self._add_idle(self._plane_index[id(plane)], trip.end)
+        del self.trips[trip.id]
+        if self.archive is not None:
+            self.archive.append(trip)
+
+    def travel_time_between(self, start: Node, end: Node) -> int:
+        if self.network is not None:
+            return self.network.travel_time(start.id, end.id)
+        return self.travel_time
+
+    def free_planes(self) -> list[Plane]:
+        return [self.planes[i] for i in sorted(self.idle)]
+
+    def request_arrivals(self):
+        while self.events and self.events[0][:2] <= (self.curr_time, ARRIVAL):
+            _, _, _, start, end, real = heapq.heappop(self.events)
+            self.request_trip(start, end, real)
+        while self._next_demand is not None and self._next_demand[0] <= self.curr_time:
+            _, start_id, end_id = self._next_demand
+            start, end = self._node_by_id[start_id], self._node_by_id[end_id]
+            self.request_trip(start, end, real=True)
+            assert self._demand is not None
+            self._next_demand = next(self._demand, None)
 
     def assign_trips(self):
-        for trip in self.trips:
-            if trip.end_time is None:
-                for plane in self.planes:
-                    if plane.curr_node == trip.start:
-                        self.assign_trip(trip, plane)
-                        break
+        """
+        gives the oldest pending trips at each node the idle planes there, first
+        plane first. Only nodes that changed since the last call can match.
+        """
+        changed_nodes, self._changed_nodes = self._changed_nodes, set()
+        for node_id in changed_nodes:
+            queue = self.queues[node_id]
+            idle_at = self.idle_at[node_id]
+            while queue and idle_at:
+                trip = queue.popleft()
+                if trip.pending():
+                    self.assign_trip(trip, self.planes[min(idle_at)])
 
     def complete_trips(self):
-        for trip in self.trips:
-            if trip.end_time == self.curr_time:
-                self.complete_trip(trip)
+        while self.events and self.events[0][0] <= self.curr_time:
+            _, _, _, trip = heapq.heappop(self.events)
+            self.complete_trip(trip)
+
+    def next_request_time(self) -> Optional[int]:
+        """
+        next tick request_trips and move_planes need to run at, or None if they
+        only need to run when an event is due
+        """
+        if self._demand is not None:
+            return self._next_demand[0] if self._next_demand is not None else None
+        return self.curr_time + 1
+
+    def _next_time(self, steps: int) -> int:
+        """
+        next tick to visit: the earliest of next_request_time, the next event
+        and steps. Planes that landed this tick, or trips requested after
+        assign_trips ran, can only be matched on the next tick, so it is never
+        skipped while a node has changed.
+        """
+        if self._changed_nodes:
+            return self.curr_time + 1
+        next_time = self.next_request_time()
+        if self.events and (next_time is None or self.events[0][0] < next_time):
+            next_time = self.events[0][0]
+        if next_time is None or next_time > steps:
+            next_time = steps
+        return max(next_time, self.curr_time + 1)
 
     def simulate(self, steps: int):
+        phases = (
+            self.request_arrivals,
+            self.request_trips,
+            self.move_planes,
+            self.assign_trips,
+            self.complete_trips,
+        )
         while self.curr_time < steps:
-            self.request_trips()
-            self.move_planes()
-            self.assign_trips()
-            self.complete_trips()
-            self.curr_time += 1
+            if self.profiler is not None:
+                self.profiler.run_tick(self, phases)
+            else:
+                self.request_arrivals()
+                self.request_trips()
+                self.move_planes()
+                self.assign_trips()
+                self.complete_trips()
+
+            self.curr_time = self._next_time(steps)
+        if self.metrics is not None:
+            self.metrics.advance(self.curr_time)
 
     @abc.abstractmethod
     def request_trips(self): ...
@@ -96,17 +271,21 @@ class Simulation(abc.ABC):
 
 class BasicSimulation(Simulation):
     def request_trips(self):
-        self.request_trip(random.choice(nodes), random.choice(nodes), real=True)
+        if self.demand is None:
+            rng = self.rng if self.rng is not None else random
+            start, end = rng.choice(self.nodes), rng.choice(self.nodes)
+            self.request_trip(start, end, real=True)
 
     def move_planes(self):
-        outstanding_trips = [t for t in self.trips if t.end_time is None]
-        free_planes = [p for p in self.planes if p.curr_trip is None]
+        free_planes = self.free_planes()
+        outstanding_trips = list(islice(self.pending.values(), len(free_planes)))
         for trip, plane in zip(outstanding_trips, free_planes):
             assert plane.curr_node is not None
             self.request_trip(plane.curr_node, trip.start, real=False)
 
 
-nodes = [Node(i) for i in range(NUM_NODES)]
-planes = [Plane(random.choice(nodes)) for _ in range(NUM_PLANES)]
-simulation = BasicSimulation(nodes, planes)
-simulation.simulate(NUM_STEPS)
+if __name__ == "__main__":
+    nodes = [Node(i) for i in range(NUM_NODES)]
+    planes = [Plane(random.choice(nodes)) for _ in range(NUM_PLANES)]
+    simulation = BasicSimulation(nodes, planes)
+    simulation.simulate(NUM_STEPS)
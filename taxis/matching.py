@@ -0,0 +1,167 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from main import BasicSimulation, Plane, Trip
+
+
+def min_cost_assignment(cost: np.ndarray) -> np.ndarray:
+    """
+    Hungarian algorithm (shortest augmenting paths with potentials) for a
+    rectangular cost matrix. Returns the column assigned to each row, or -1 for
+    the rows left out when there are more rows than columns. O(n^2 m) with the
+    scan over columns vectorized.
+    """
+    num_rows, num_columns = cost.shape
+    if num_rows > num_columns:
+        rows = np.full(num_rows, -1)
+        columns = min_cost_assignment(cost.T)
+        rows[columns] = np.arange(num_columns)
+        return rows
+
+    # 1 based with column 0 as the start of each augmenting path
+    u = np.zeros(num_rows + 1)
+    v = np.zeros(num_columns + 1)
+    row_of = np.zeros(num_columns + 1, dtype=np.int64)
+    way = np.zeros(num_columns + 1, dtype=np.int64)
+    for row in range(1, num_rows + 1):
+        row_of[0] = row
+        column = 0
+        min_reduced = np.full(num_columns + 1, np.inf)
+        used = np.zeros(num_columns + 1, dtype=bool)
+        while row_of[column] != 0:
+            used[column] = True
+            i = row_of[column]
+            reduced = cost[i - 1] - u[i] - v[1:]
+            improved = ~used[1:] & (reduced < min_reduced[1:])
+            min_reduced[1:][improved] = reduced[improved]
+            way[1:][improved] = column
+            candidates = np.where(used, np.inf, min_reduced)
+            next_column = int(np.argmin(candidates))
+            delta = candidates[next_column]
+            u[row_of[used]] += delta
+            v[used] -= delta
+            min_reduced[~used] -= delta
+            column = next_column
+        while column:
+            previous = way[column]
+            row_of[column] = row_of[previous]
+            column = previous
+
+    rows = np.full(num_rows, -1)
+    assigned = np.nonzero(row_of[1:])[0]
+    rows[row_of[1:][assigned] - 1] = assigned
+    return rows
+
+
+@dataclass
+class MatchingSimulation(BasicSimulation):
+    """
+    Each tick, idle planes that no request at their own node needs are matched
+    to requests elsewhere that neither the planes there nor those flying there
+    will take, minimizing the sum of travel time to the request minus
+    wait_weight times how long it has waited. A matched plane is sent off
+    straight away with a single repositioning trip and the request counts as
+    covered until it lands. Requests take planes at their own node first,
+    even when a plane is already flying to them.
+
+    Only the oldest uncovered requests at each node can be matched (no more
+    than there are planes to send), and nothing is solved on ticks without
+    both idle planes and uncovered requests.
+    """
+
+    wait_weight: float = 1.0
+    # repositioning planes flying to each node id
+    inbound: dict[int, int] = field(
+        default_factory=lambda: defaultdict(int), init=False, repr=False
+    )
+
+    def _waiting(self, node_id: int, skip: int, limit: int) -> list[Trip]:
+        """
+        oldest pending trips at the node past the first skip of them
+        """
+        queue = self.queues[node_id]
+        while queue and not queue[0].pending():
+            queue.popleft()
+        trips = []
+        for trip in queue:
+            if len(trips) == limit:
+                break
+            if trip.pending():
+                if skip:
+                    skip -= 1
+                else:
+                    trips.append(trip)
+        return trips
+
+    def move_planes(self):
+        if not self.idle:
+            return
+        planes: list[Plane] = []
+        for node_id, idle_at in self.idle_at.items():
+            if idle_at:
+                # requests at the node take the first planes there, even if
+                # other planes are flying to it
+                staying = len(self._waiting(node_id, 0, len(idle_at)))
+                planes.extend(self.planes[i] for i in sorted(idle_at)[staying:])
+        if not planes:
+            return
+
+        trips: list[Trip] = []
+        for node_id, queue in self.queues.items():
+            if queue:
+                # past those the planes at the node and flying to it will take
+                skip = len(self.idle_at[node_id]) + self.inbound[node_id]
+                trips.extend(self._waiting(node_id, skip, len(planes)))
+        if not trips:
+            return
+
+        for plane, trip in self.match(planes, trips):
+            assert plane.curr_node is not None
+            reposition = self.request_trip(plane.curr_node, trip.start, real=False)
+            self.assign_trip(reposition, plane)
+            self.inbound[trip.start.id] += 1
+
+    def travel_times(self, planes: list[Plane], trips: list[Trip]) -> np.ndarray:
+        """
+        travel time from each plane to the start of each trip
+        """
+        if self.network is None:
+            return np.full((len(planes), len(trips)), self.travel_time)
+        return self.network.submatrix(
+            [plane.curr_node.id for plane in planes if plane.curr_node is not None],
+            [trip.start.id for trip in trips],
+        )
+
+    def match(self, planes: list[Plane], trips: list[Trip]) -> list[tuple[Plane, Trip]]:
+        waited = np.array([self.curr_time - trip.request_time for trip in trips])
+        cost = self.travel_times(planes, trips) - self.wait_weight * waited
+        return [
+            (plane, trips[column])
+            for plane, column in zip(planes, min_cost_assignment(cost))
+            if column >= 0
+        ]
+
+    def complete_trip(self, trip: Trip):
+        super().complete_trip(trip)
+        if not trip.real:
+            self.inbound[trip.end.id] -= 1
+
+
+class NearestPlaneSimulation(MatchingSimulation):
+    """
+    Greedy alternative to the assignment: the oldest uncovered requests each
+    take the nearest plane that is still free.
+    """
+
+    def match(self, planes: list[Plane], trips: list[Trip]) -> list[tuple[Plane, Trip]]:
+        times = self.travel_times(planes, trips).astype(float)
+        matches = []
+        for column in np.argsort([trip.request_time for trip in trips], kind="stable"):
+            if len(matches) == len(planes):
+                break
+            row = int(times[:, column].argmin())
+            matches.append((planes[row], trips[column]))
+            times[row] = np.inf
+        return matches
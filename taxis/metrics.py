@@ -0,0 +1,230 @@
+import math
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from main import Trip
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+@dataclass
+class RunningMean:
+    count: int = 0
+    mean: float = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        self.mean += (value - self.mean) / self.count
+
+    def merge(self, other: "RunningMean"):
+        count = self.count + other.count
+        if count:
+            self.mean += (other.mean - self.mean) * other.count / count
+        self.count = count
+
+
+class QuantileSketch:
+    """
+    Log bucketed quantile sketch (DDSketch). Values are counted in buckets
+    whose bounds grow by gamma = (1 + a) / (1 - a), so any quantile is
+    returned within relative error a. Sketches with the same accuracy can
+    be merged, and the lowest buckets are folded together once there are more
+    than max_buckets of them.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, count: int = 1):
+        self.count += count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 0:
+            self.zero_count += count
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        lowest, second = sorted(self.buckets)[:2]
+        self.buckets[second] += self.buckets.pop(lowest)
+
+    def merge(self, other: "QuantileSketch"):
+        assert self.gamma == other.gamma
+        self.count += other.count
+        self.zero_count += other.zero_count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        while len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return max(self.min, 0.0)
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                value = 2 * self.gamma**key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+
+@dataclass
+class WaitStats:
+    mean: RunningMean = field(default_factory=RunningMean)
+    sketch: QuantileSketch = field(default_factory=QuantileSketch)
+
+    def add(self, wait: int):
+        self.mean.add(wait)
+        self.sketch.add(wait)
+
+    def merge(self, other: "WaitStats"):
+        self.mean.merge(other.mean)
+        self.sketch.merge(other.sketch)
+
+
+@dataclass
+class MetricsSnapshot:
+    start: int
+    end: int
+    # real trips that got a plane
+    trips: int
+    mean_wait: Optional[float]
+    quantile_waits: dict[float, Optional[float]]
+    # plane ticks spent idle
+    idle_time: int
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class MetricsCollector:
+    """
+    Online versions of the metrics in README.md, updated by Simulation as trips
+    are assigned and completed instead of by rescanning trips afterwards.
+
+    The wait of a real trip is the time from its request until a plane takes it
+    (repositioning trips are not counted). A plane is idle from when it lands
+    until it is assigned its next trip. With window, a snapshot of the waits
+    and idle time within each window of that many ticks is appended to
+    snapshots as the simulation passes it.
+    """
+
+    def __init__(
+        self,
+        window: Optional[int] = None,
+        quantiles: tuple[float, ...] = QUANTILES,
+        relative_accuracy: float = 0.01,
+    ):
+        self.window = window
+        self.quantiles = quantiles
+        self.relative_accuracy = relative_accuracy
+        self.wait = self._new_wait_stats()
+        # idle time of each plane up to idle_since, and when it last landed
+        self.plane_idle_time: list[int] = []
+        self.idle_since: list[Optional[int]] = []
+        self.idle_time = 0
+        self.num_idle = 0
+        self.snapshots: list[MetricsSnapshot] = []
+        self._time = 0
+        self._window_start = 0
+        self._window_wait = self._new_wait_stats()
+        self._window_idle_time = 0
+
+    def _new_wait_stats(self) -> WaitStats:
+        return WaitStats(sketch=QuantileSketch(self.relative_accuracy))
+
+    def advance(self, time: int):
+        """
+        accounts for idle planes up to time, closing any windows passed
+        """
+        while self.window is not None and time >= self._window_start + self.window:
+            window_end = self._window_start + self.window
+            self._accumulate(window_end)
+            self.snapshots.append(
+                self._snapshot(
+                    self._window_start,
+                    window_end,
+                    self._window_wait,
+                    self._window_idle_time,
+                )
+            )
+            self._window_start = window_end
+            self._window_wait = self._new_wait_stats()
+            self._window_idle_time = 0
+        self._accumulate(time)
+
+    def _accumulate(self, time: int):
+        idle_time = self.num_idle * (time - self._time)
+        self.idle_time += idle_time
+        self._window_idle_time += idle_time
+        self._time = time
+
+    def plane_idle(self, plane_index: int, time: int):
+        self.advance(time)
+        while len(self.idle_since) <= plane_index:
+            self.plane_idle_time.append(0)
+            self.idle_since.append(None)
+        self.idle_since[plane_index] = time
+        self.num_idle += 1
+
+    def trip_assigned(self, trip: Trip, plane_index: int, time: int):
+        self.advance(time)
+        idle_since = self.idle_since[plane_index]
+        assert idle_since is not None
+        self.plane_idle_time[plane_index] += time - idle_since
+        self.idle_since[plane_index] = None
+        self.num_idle -= 1
+        if trip.real:
+            self.wait.add(time - trip.request_time)
+            self._window_wait.add(time - trip.request_time)
+
+    def plane_idle_times(self, time: int) -> list[int]:
+        """
+        idle time of each plane up to time, counting planes that are idle now
+        """
+        return [
+            idle_time + (time - since if since is not None else 0)
+            for idle_time, since in zip(self.plane_idle_time, self.idle_since)
+        ]
+
+    def _snapshot(
+        self, start: int, end: int, wait: WaitStats, idle_time: int
+    ) -> MetricsSnapshot:
+        return MetricsSnapshot(
+            start,
+            end,
+            wait.mean.count,
+            wait.mean.mean if wait.mean.count else None,
+            {q: wait.sketch.quantile(q) for q in self.quantiles},
+            idle_time,
+        )
+
+    def summary(self) -> MetricsSnapshot:
+        """
+        metrics over the whole run so far
+        """
+        return self._snapshot(0, self._time, self.wait, self.idle_time)
+
+    def merge(self, other: "MetricsCollector"):
+        """
+        adds the waits and idle time of another run, e.g. a replica
+        """
+        self.wait.merge(other.wait)
+        self.idle_time += other.idle_time
@@ -0,0 +1,68 @@
+from collections.abc import Iterable
+
+import numpy as np
+
+
+def _check_time(time: float, name: str):
+    if time < 0 or not float(time).is_integer():
+        raise ValueError(f"{name} must be a non-negative integer, not {time}")
+
+
+class Network:
+    """
+    Weighted graph of nodes with the shortest travel time between every pair
+    precomputed once (Floyd-Warshall, one vectorized relaxation per node) into
+    a dense matrix, so lookups during a simulation are O(1).
+
+    Travel times are non-negative integer ticks. A trip from a node back to
+    itself takes self_travel_time, like every trip does with a fixed
+    Simulation.travel_time, so uniform(n, t) behaves the same as travel_time=t.
+    """
+
+    def __init__(
+        self,
+        num_nodes: int,
+        edges: Iterable[tuple[int, int, int]],
+        directed: bool = False,
+        self_travel_time: int = 0,
+    ):
+        _check_time(self_travel_time, "self_travel_time")
+        times = np.full((num_nodes, num_nodes), np.inf)
+        np.fill_diagonal(times, 0)
+        for start, end, time in edges:
+            if not (0 <= start < num_nodes and 0 <= end < num_nodes):
+                raise ValueError(f"edge ({start}, {end}) has a node out of range")
+            _check_time(time, f"travel time of edge ({start}, {end})")
+            times[start, end] = min(times[start, end], time)
+            if not directed:
+                times[end, start] = min(times[end, start], time)
+        for via in range(num_nodes):
+            np.minimum(times, times[:, via, None] + times[None, via, :], out=times)
+        if not np.isfinite(times).all():
+            raise ValueError("every node must be reachable from every other node")
+        np.fill_diagonal(times, self_travel_time)
+
+        self.travel_times = times.astype(np.int64)
+        # nested lists are faster than NumPy for looking up one pair at a time
+        self._rows = self.travel_times.tolist()
+
+    @classmethod
+    def uniform(cls, num_nodes: int, travel_time: int) -> "Network":
+        return cls(
+            num_nodes,
+            (
+                (start, end, travel_time)
+                for start in range(num_nodes)
+                for end in range(start + 1, num_nodes)
+            ),
+            self_travel_time=travel_time,
+        )
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def travel_time(self, start: int, end: int) -> int:
+        return self._rows[start][end]
+
+    def submatrix(self, starts: Iterable[int], ends: Iterable[int]) -> np.ndarray:
+        return self.travel_times[np.ix_(list(starts), list(ends))]
@@ -0,0 +1,95 @@
+import json
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass, field
+
+from main import Simulation
+
+PHASES = (
+    "request_arrivals",
+    "request_trips",
+    "move_planes",
+    "assign_trips",
+    "complete_trips",
+)
+
+
+@dataclass
+class PhaseStats:
+    calls: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class Profiler:
+    """
+    Opt in timing of each phase of Simulation.simulate, passed as
+    Simulation(..., profiler=Profiler()). Trip counts are read off the
+    simulation (requested, no longer pending, no longer live) rather than
+    counted in the hot paths, and the sizes of the live sets are sampled every
+    sample_every ticks.
+    """
+
+    sample_every: int = 1000
+    ticks: int = 0
+    phases: dict[str, PhaseStats] = field(
+        default_factory=lambda: {name: PhaseStats() for name in PHASES}
+    )
+    counts: dict[str, int] = field(default_factory=dict)
+    samples: list[dict[str, int]] = field(default_factory=list)
+    _next_sample: int = 0
+
+    def run_tick(self, simulation: Simulation, phases: Sequence[Callable[[], None]]):
+        for name, phase in zip(PHASES, phases):
+            start = time.perf_counter()
+            phase()
+            stats = self.phases[name]
+            stats.seconds += time.perf_counter() - start
+            stats.calls += 1
+        self.ticks += 1
+
+        num_trips = simulation.num_trips
+        self.counts = {
+            "requested": num_trips,
+            "assigned": num_trips - len(simulation.pending),
+            "completed": num_trips - len(simulation.trips),
+        }
+        if simulation.curr_time >= self._next_sample:
+            self.samples.append(
+                {
+                    "time": simulation.curr_time,
+                    **self.counts,
+                    "pending": len(simulation.pending),
+                    "in_flight": len(simulation.trips) - len(simulation.pending),
+                    "idle_planes": len(simulation.idle),
+                    "events": len(simulation.events),
+                }
+            )
+            self._next_sample = (
+                simulation.curr_time // self.sample_every + 1
+            ) * self.sample_every
+
+    def summary(self) -> str:
+        total = sum(stats.seconds for stats in self.phases.values()) or 1.0
+        header = ("phase", "calls", "seconds", "us/call", "share")
+        lines = ["{:<18}{:>10}{:>12}{:>10}{:>8}".format(*header)]
+        for name, stats in self.phases.items():
+            per_call = stats.seconds / stats.calls * 1e6 if stats.calls else 0.0
+            lines.append(
+                f"{name:<18}{stats.calls:>10}{stats.seconds:>12.4f}"
+                f"{per_call:>10.1f}{stats.seconds / total:>8.1%}"
+            )
+        counts = ", ".join(f"{count} {name}" for name, count in self.counts.items())
+        lines.append(f"{self.ticks} ticks, trips: {counts}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        return {
+            "ticks": self.ticks,
+            "phases": {name: asdict(stats) for name, stats in self.phases.items()},
+            "counts": self.counts,
+            "samples": self.samples,
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
@@ -0,0 +1,177 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from main import NUM_NODES, NUM_PLANES, TRAVEL_TIME
+
+
+@dataclass
+class ReplicaResults:
+    """
+    metrics of each replica, as arrays of shape (num_replicas,)
+    """
+
+    # requests that got a plane
+    served: np.ndarray
+    # requests still waiting for a plane
+    pending: np.ndarray
+    # ticks spent waiting by every request, served or not
+    wait_time: np.ndarray
+    # plane ticks spent idle, from landing until the next flight as in
+    # MetricsCollector
+    idle_time: np.ndarray
+    repositions: np.ndarray
+
+    @property
+    def mean_wait_with_pending(self) -> np.ndarray:
+        """
+        mean ticks waited so far per request, counting the requests still
+        waiting (Little's law). Unlike MetricsCollector's mean_wait, which only
+        averages requests that got a plane, the waits are not known one request
+        at a time.
+        """
+        return self.wait_time / np.maximum(self.served + self.pending, 1)
+
+
+class VectorizedSimulation:
+    """
+    Many independent replicas of the fixed TRAVEL_TIME model stepped together
+    with NumPy. Each replica is its planes' nodes and busy-until times and a
+    count of the requests waiting at each node, as (num_replicas, num_planes)
+    and (num_replicas, num_nodes) arrays.
+
+    Every tick each replica gets requests_per_tick requests from uniformly
+    random nodes, the same demand as BasicSimulation. Destinations are only
+    drawn when a plane takes a request, which gives the same distribution.
+
+    The strategy is its own, cover-once repositioning, and not the one of
+    BasicSimulation: idle planes take the requests at their node (first plane
+    first, same as Simulation.assign_trips), then the remaining idle planes
+    are sent, in plane order, to the requests that no plane is already flying
+    to, in node order. It is closest to MatchingSimulation with uniform travel
+    times, which sends planes to the oldest uncovered requests instead.
+    """
+
+    def __init__(
+        self,
+        num_replicas: int,
+        num_nodes: int = NUM_NODES,
+        num_planes: int = NUM_PLANES,
+        travel_time: int = TRAVEL_TIME,
+        requests_per_tick: int = 1,
+        seed: Optional[int] = None,
+    ):
+        self.num_replicas = num_replicas
+        self.num_nodes = num_nodes
+        self.num_planes = num_planes
+        self.travel_time = travel_time
+        self.requests_per_tick = requests_per_tick
+        self.rng = np.random.default_rng(seed)
+        self.curr_time = 0
+
+        shape = (num_replicas, num_planes)
+        self.plane_node = self.rng.integers(num_nodes, size=shape)
+        # a plane is idle once curr_time is past the end of its last flight
+        self.busy_until = np.full(shape, -1, dtype=np.int64)
+        self.repositioning = np.zeros(shape, dtype=bool)
+        self.pending = np.zeros((num_replicas, num_nodes), dtype=np.int64)
+
+        self.served = np.zeros(num_replicas, dtype=np.int64)
+        self.wait_time = np.zeros(num_replicas, dtype=np.int64)
+        self.idle_time = np.zeros(num_replicas, dtype=np.int64)
+        self.repositions = np.zeros(num_replicas, dtype=np.int64)
+        self._rows = np.arange(num_replicas)[:, None]
+
+    def _cells(self) -> np.ndarray:
+        """
+        flat (replica, node) index of each plane's node
+        """
+        return self._rows * self.num_nodes + self.plane_node
+
+    def _count(self, cells: np.ndarray) -> np.ndarray:
+        size = self.num_replicas * self.num_nodes
+        counts = np.bincount(cells.ravel(), minlength=size)
+        return counts.reshape(self.num_replicas, self.num_nodes)
+
+    def request_trips(self):
+        origins = self.rng.integers(
+            self.num_nodes, size=(self.num_replicas, self.requests_per_tick)
+        )
+        self.pending += self._count(self._rows * self.num_nodes + origins)
+
+    def assign_trips(self, idle: np.ndarray) -> np.ndarray:
+        cells = self._cells()
+        remaining = self.pending.ravel().copy()
+        assigned = np.zeros_like(idle)
+        # one plane per replica at a time, so no cell is taken from twice at once
+        for plane in range(self.num_planes):
+            plane_cells = cells[:, plane]
+            takes = idle[:, plane] & (remaining[plane_cells] > 0)
+            remaining[plane_cells[takes]] -= 1
+            assigned[:, plane] = takes
+
+        matches = self._count(cells[assigned])
+        self.pending -= matches
+        self.served += matches.sum(axis=1)
+        self.plane_node[assigned] = self.rng.integers(
+            self.num_nodes, size=int(assigned.sum())
+        )
+        self.busy_until[assigned] = self.curr_time + self.travel_time
+        self.repositioning[assigned] = False
+        return assigned
+
+    def move_planes(self, free: np.ndarray) -> np.ndarray:
+        """
+        sends the j-th free plane of a replica to the node of the j-th request
+        that no plane is flying to
+        """
+        if not free.any():
+            return free
+        inbound = self.repositioning & (self.busy_until >= self.curr_time)
+        need = np.maximum(self.pending - self._count(self._cells()[inbound]), 0)
+        total = need.sum(axis=1)
+
+        ranks = free.cumsum(axis=1) - 1
+        movers = free & (ranks < total[:, None])
+        replicas = np.nonzero(movers)[0]
+
+        # search every replica's cumulative need at once by offsetting rows
+        stride = int(total.max(initial=0)) + 1
+        offsets = np.arange(self.num_replicas) * stride
+        cumulative = (need.cumsum(axis=1) + offsets[:, None]).ravel()
+        targets = np.searchsorted(
+            cumulative, offsets[replicas] + ranks[movers], side="right"
+        )
+
+        self.plane_node[movers] = targets - replicas * self.num_nodes
+        self.busy_until[movers] = self.curr_time + self.travel_time
+        self.repositioning[movers] = True
+        self.repositions += movers.sum(axis=1)
+        return movers
+
+    def step(self):
+        self.request_trips()
+        idle = self.busy_until < self.curr_time
+        landing = self.busy_until == self.curr_time
+        free = idle & ~self.assign_trips(idle)
+        still_idle = free & ~self.move_planes(free)
+
+        # planes landing now are idle from this tick, like in MetricsCollector
+        self.idle_time += (still_idle | landing).sum(axis=1)
+        self.wait_time += self.pending.sum(axis=1)
+        self.curr_time += 1
+
+    def simulate(self, steps: int) -> ReplicaResults:
+        while self.curr_time < steps:
+            self.step()
+        return self.results()
+
+    def results(self) -> ReplicaResults:
+        return ReplicaResults(
+            self.served.copy(),
+            self.pending.sum(axis=1),
+            self.wait_time.copy(),
+            self.idle_time.copy(),
+            self.repositions.copy(),
+        )
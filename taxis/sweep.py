@@ -0,0 +1,210 @@
+"""
+Runs every combination of a parameter grid and strategies, with several seeded
+runs each, and writes one row of metrics per combination as soon as all of its
+runs have finished.
+
+    python sweep.py -o sweep.csv --nodes 20 50 --planes 5 10 20 --seeds 8 \\
+        --strategy main.BasicSimulation --workers 8
+"""
+
+import argparse
+import csv
+import importlib
+import itertools
+import random
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from main import NUM_NODES, NUM_PLANES, NUM_STEPS, TRAVEL_TIME, Node, Plane, Simulation
+from metrics import MetricsCollector
+
+
+@dataclass(frozen=True)
+class Config:
+    strategy: type[Simulation]
+    num_nodes: int = NUM_NODES
+    num_planes: int = NUM_PLANES
+    travel_time: int = TRAVEL_TIME
+    num_steps: int = NUM_STEPS
+
+
+def grid(
+    strategies: Iterable[type[Simulation]],
+    num_nodes: Iterable[int] = (NUM_NODES,),
+    num_planes: Iterable[int] = (NUM_PLANES,),
+    travel_time: Iterable[int] = (TRAVEL_TIME,),
+    num_steps: Iterable[int] = (NUM_STEPS,),
+) -> list[Config]:
+    return [
+        Config(*values)
+        for values in itertools.product(
+            strategies, num_nodes, num_planes, travel_time, num_steps
+        )
+    ]
+
+
+def run(config: Config, seed: str) -> tuple[MetricsCollector, float]:
+    """
+    runs one simulation, returning its metrics and wall time
+    """
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    nodes = [Node(i) for i in range(config.num_nodes)]
+    planes = [Plane(rng.choice(nodes)) for _ in range(config.num_planes)]
+    metrics = MetricsCollector()
+    simulation = config.strategy(
+        nodes, planes, metrics=metrics, travel_time=config.travel_time, rng=rng
+    )
+    simulation.simulate(config.num_steps)
+    return metrics, time.perf_counter() - start
+
+
+def _row(config: Config, runs: list[tuple[MetricsCollector, float]]) -> dict:
+    metrics = runs[0][0]
+    for other, _ in runs[1:]:
+        metrics.merge(other)
+    summary = metrics.summary()
+    plane_time = config.num_planes * config.num_steps * len(runs)
+    row = asdict(config)
+    row["strategy"] = f"{config.strategy.__module__}.{config.strategy.__qualname__}"
+    row.update(
+        runs=len(runs),
+        trips=summary.trips,
+        mean_wait=summary.mean_wait,
+        **{f"wait_p{round(q * 100)}": w for q, w in summary.quantile_waits.items()},
+        idle_fraction=summary.idle_time / plane_time if plane_time else None,
+        seconds=sum(seconds for _, seconds in runs),
+    )
+    return row
+
+
+def sweep(
+    configs: list[Config], seeds: int = 1, base_seed: int = 0, workers: int = 1
+) -> Iterator[dict]:
+    """
+    yields a row of metrics for each config as its runs finish. Run i of every
+    config uses the same seed, so configs are compared on the same demand.
+    """
+    runs: dict[int, list] = {i: [] for i in range(len(configs))}
+    tasks = [(i, f"{base_seed}:{j}") for i in range(len(configs)) for j in range(seeds)]
+
+    if workers == 1:
+        for i, seed in tasks:
+            runs[i].append(run(configs[i], seed))
+            if len(runs[i]) == seeds:
+                yield _row(configs[i], runs.pop(i))
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(workers) as executor:
+        futures = {executor.submit(run, configs[i], seed): i for i, seed in tasks}
+        for future in as_completed(futures):
+            i = futures[future]
+            runs[i].append(future.result())
+            if len(runs[i]) == seeds:
+                yield _row(configs[i], runs.pop(i))
+
+
+class CSVWriter:
+    def __init__(self, path: str):
+        self.file = open(path, "w", newline="")
+        self.writer: Optional[csv.DictWriter] = None
+
+    def write(self, row: dict):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(row))
+            self.writer.writeheader()
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """
+    writes a row group every batch_size rows, needs pyarrow
+    """
+
+    def __init__(self, path: str, batch_size: int = 64):
+        import pyarrow.parquet
+
+        self.path = path
+        self.batch_size = batch_size
+        self._parquet = pyarrow.parquet
+        self.writer = None
+        self.rows: list[dict] = []
+
+    def write(self, row: dict):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self.rows:
+            return
+        import pyarrow
+
+        table = pyarrow.Table.from_pylist(self.rows)
+        if self.writer is None:
+            self.writer = self._parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+        self.rows = []
+
+    def close(self):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def open_writer(path: str):
+    if path.endswith(".parquet"):
+        return ParquetWriter(path)
+    return CSVWriter(path)
+
+
+def load_strategy(name: str) -> type[Simulation]:
+    module, _, qualname = name.rpartition(".")
+    return getattr(importlib.import_module(module or "main"), qualname)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-o", "--output", required=True, help=".csv or .parquet")
+    parser.add_argument(
+        "--strategy", nargs="+", default=["main.BasicSimulation"], help="module.Class"
+    )
+    parser.add_argument("--nodes", type=int, nargs="+", default=[NUM_NODES])
+    parser.add_argument("--planes", type=int, nargs="+", default=[NUM_PLANES])
+    parser.add_argument("--travel-time", type=int, nargs="+", default=[TRAVEL_TIME])
+    parser.add_argument("--steps", type=int, nargs="+", default=[NUM_STEPS])
+    parser.add_argument("--seeds", type=int, default=1, help="runs per configuration")
+    parser.add_argument("--base-seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    configs = grid(
+        [load_strategy(name) for name in args.strategy],
+        args.nodes,
+        args.planes,
+        args.travel_time,
+        args.steps,
+    )
+    writer = open_writer(args.output)
+    try:
+        for done, row in enumerate(
+            sweep(configs, args.seeds, args.base_seed, args.workers), 1
+        ):
+            writer.write(row)
+            print(f"{done}/{len(configs)}", file=sys.stderr)
+    finally:
+        writer.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from archive import COLUMNS, TripArchive  # noqa: E402
+from main import Node, Trip  # noqa: E402
+
+
+def make_trips(count):
+    nodes = [Node(i) for i in range(7)]
+    return [
+        Trip(
+            i,
+            nodes[i % 7],
+            nodes[i * 3 % 7],
+            request_time=i,
+            real=i % 3 != 0,
+            start_time=i + i % 4,
+            end_time=i + i % 4 + 5,
+        )
+        for i in range(count)
+    ]
+
+
+def expected_columns(trips):
+    return {
+        "id": [t.id for t in trips],
+        "start": [t.start.id for t in trips],
+        "end": [t.end.id for t in trips],
+        "request_time": [t.request_time for t in trips],
+        "start_time": [t.start_time for t in trips],
+        "end_time": [t.end_time for t in trips],
+        "real": [t.real for t in trips],
+    }
+
+
+class TestTripArchive:
+    @pytest.mark.parametrize("count", [0, 3, 4, 10])
+    def test_columns(self, count):
+        trips = make_trips(count)
+        archive = TripArchive(chunk_size=4)
+        for trip in trips:
+            archive.append(trip)
+        assert len(archive) == count
+        for name, values in expected_columns(trips).items():
+            column = archive.column(name)
+            assert column.dtype == COLUMNS[name]
+            assert column.tolist() == values
+
+    @pytest.mark.parametrize("count", [0, 3, 4, 10])
+    def test_spill(self, tmp_path, count):
+        trips = make_trips(count)
+        spill_dir = tmp_path / "trips"
+        archive = TripArchive(chunk_size=4, spill_dir=str(spill_dir))
+        for trip in trips:
+            archive.append(trip)
+        assert len(archive) == count
+        assert len(list(spill_dir.iterdir())) == count // 4 * len(COLUMNS)
+        assert archive.nbytes == TripArchive(chunk_size=4).nbytes
+        for name, values in expected_columns(trips).items():
+            column = archive.column(name)
+            assert column.dtype == COLUMNS[name]
+            assert column.tolist() == values
+
+        spilled = list(archive.chunks())[: count // 4]
+        assert all(isinstance(chunk["id"], np.memmap) for chunk in spilled)
+
+    def test_nbytes(self):
+        archive = TripArchive(chunk_size=4)
+        row_size = sum(np.dtype(dtype).itemsize for dtype in COLUMNS.values())
+        assert archive.nbytes == 4 * row_size
+        for trip in make_trips(9):
+            archive.append(trip)
+        assert archive.nbytes == 3 * 4 * row_size
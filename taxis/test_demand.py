@@ -0,0 +1,105 @@
+import itertools
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from demand import poisson_demand, trace_demand, write_trace  # noqa: E402
+from main import BasicSimulation, Node, Plane  # noqa: E402
+
+
+class TestPoissonDemand:
+    @pytest.mark.parametrize("batch_size", [1, 7, 100, 1024])
+    def test_batches(self, batch_size):
+        # 18 requests per tick, so every tick has some
+        rates = np.full((3, 3), 2.0)
+        requests = list(poisson_demand(rates, batch_size=batch_size, seed=0, steps=100))
+        times = [time for time, _, _ in requests]
+        assert times == sorted(times)
+        assert set(times) == set(range(100))
+        assert all(0 <= start < 3 and 0 <= end < 3 for _, start, end in requests)
+        assert requests == list(
+            poisson_demand(rates, batch_size=batch_size, seed=0, steps=100)
+        )
+
+    def test_steps(self):
+        rates = np.full((2, 2), 2.0)
+        requests = list(poisson_demand(rates, batch_size=64, seed=1, steps=130))
+        assert max(time for time, _, _ in requests) == 129
+        unbounded = poisson_demand(rates, batch_size=64, seed=1)
+        assert list(itertools.islice(unbounded, 10_000))[-1][0] > 130
+
+    def test_rates(self):
+        rates = np.zeros((3, 3))
+        rates[0, 1] = 3.0
+        rates[2, 0] = 1.0
+        requests = list(poisson_demand(rates, seed=2, steps=10_000))
+        pairs = [(start, end) for _, start, end in requests]
+        assert set(pairs) == {(0, 1), (2, 0)}
+        assert len(requests) / 10_000 == pytest.approx(4.0, rel=0.02)
+        assert pairs.count((0, 1)) / len(pairs) == pytest.approx(0.75, rel=0.02)
+
+    def test_profile(self):
+        rates = np.full((2, 2), 0.25)
+
+        def profile(ticks):
+            # no requests in odd ticks, 3 times the rates in even ticks
+            return np.where(ticks % 2, 0.0, 3.0)
+
+        requests = list(poisson_demand(rates, profile, seed=3, steps=10_000))
+        assert all(time % 2 == 0 for time, _, _ in requests)
+        assert len(requests) / 5_000 == pytest.approx(3.0, rel=0.03)
+
+    @pytest.mark.parametrize(
+        "rates,match",
+        [
+            (np.zeros((3, 3)), "all 0"),
+            (np.full((2, 2), -1.0), "non-negative"),
+            (np.full((2, 2), np.nan), "finite"),
+            (np.ones(3), "square"),
+            (np.ones((2, 3)), "square"),
+        ],
+    )
+    def test_invalid_rates(self, rates, match):
+        with pytest.raises(ValueError, match=match):
+            poisson_demand(rates)
+
+    def test_simulation(self):
+        nodes = [Node(i) for i in range(4)]
+        rates = np.full((4, 4), 0.1)
+        demand = list(poisson_demand(rates, seed=4, steps=500))
+        simulation = BasicSimulation(
+            nodes, [Plane(nodes[0]), Plane(nodes[1])], demand=demand, archive=[]
+        )
+        simulation.simulate(500)
+        trips = sorted(
+            [*simulation.archive, *simulation.trips.values()], key=lambda t: t.id
+        )
+        real = [(t.request_time, t.start.id, t.end.id) for t in trips if t.real]
+        assert real == demand
+
+
+class TestTrace:
+    @pytest.mark.parametrize("name", ["trace.jsonl", "trace.jsonl.gz"])
+    def test_round_trip(self, tmp_path, name):
+        path = str(tmp_path / name)
+        requests = list(poisson_demand(np.full((3, 3), 0.3), seed=5, steps=200))
+        write_trace(path, iter(requests))
+        assert list(trace_demand(path)) == requests
+
+    def test_blank_lines(self, tmp_path):
+        path = tmp_path / "trace.jsonl"
+        path.write_text(
+            '{"time": 1, "start": 0, "end": 1}\n\n{"time": 1, "start": 1, "end": 0}\n'
+        )
+        assert list(trace_demand(str(path))) == [(1, 0, 1), (1, 1, 0)]
+
+    def test_back_in_time(self, tmp_path):
+        path = tmp_path / "trace.jsonl"
+        lines = [{"time": t, "start": 0, "end": 1} for t in (0, 5, 5, 3)]
+        path.write_text("".join(json.dumps(line) + "\n" for line in lines))
+        requests = trace_demand(str(path))
+        assert list(itertools.islice(requests, 3)) == [(0, 0, 1), (5, 0, 1), (5, 0, 1)]
+        with pytest.raises(ValueError, match="trace.jsonl:4 goes back in time"):
+            next(requests)
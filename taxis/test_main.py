@@ -0,0 +1,256 @@
+import random
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+from main import BasicSimulation, Node, Plane
+
+
+@dataclass
+class ReferenceTrip:
+    id: int
+    start: Node
+    end: Node
+    request_time: int
+    real: bool
+    start_time: Optional[int] = None
+    end_time: Optional[int] = None
+    assigned_plane: Optional["ReferencePlane"] = None
+
+
+@dataclass
+class ReferencePlane:
+    curr_node: Optional[Node]
+    curr_trip: Optional[ReferenceTrip] = None
+
+
+class ReferenceSimulation:
+    """
+    the original engine, scanning every trip ever requested on every tick, with
+    BasicSimulation's strategy
+    """
+
+    def __init__(self, nodes, planes, rng, travel_time=5):
+        self.nodes = nodes
+        self.planes = planes
+        self.rng = rng
+        self.travel_time = travel_time
+        self.trips = []
+        self.curr_time = 0
+
+    def request_trip(self, start, end, real):
+        trip_id = 0 if not self.trips else self.trips[-1].id + 1
+        self.trips.append(ReferenceTrip(trip_id, start, end, self.curr_time, real))
+
+    def simulate(self, steps):
+        while self.curr_time < steps:
+            start, end = self.rng.choice(self.nodes), self.rng.choice(self.nodes)
+            self.request_trip(start, end, real=True)
+
+            outstanding_trips = [t for t in self.trips if t.end_time is None]
+            free_planes = [p for p in self.planes if p.curr_trip is None]
+            for trip, plane in zip(outstanding_trips, free_planes):
+                self.request_trip(plane.curr_node, trip.start, real=False)
+
+            for trip in self.trips:
+                if trip.end_time is None:
+                    for plane in self.planes:
+                        if plane.curr_node == trip.start:
+                            plane.curr_node = None
+                            plane.curr_trip = trip
+                            trip.start_time = self.curr_time
+                            trip.end_time = self.curr_time + self.travel_time
+                            trip.assigned_plane = plane
+                            break
+
+            for trip in self.trips:
+                if trip.end_time == self.curr_time:
+                    trip.assigned_plane.curr_node = trip.end
+                    trip.assigned_plane.curr_trip = None
+            self.curr_time += 1
+
+
+class TripLog(list):
+    """
+    stands in for a TripArchive to keep completed trips
+    """
+
+
+def trip_tuple(trip):
+    plane_node = getattr(trip.assigned_plane, "curr_node", None)
+    return (
+        trip.id,
+        trip.start.id,
+        trip.end.id,
+        trip.request_time,
+        trip.real,
+        trip.start_time,
+        trip.end_time,
+        plane_node.id if plane_node is not None else None,
+    )
+
+
+def run_both(seed, num_nodes, num_planes, steps):
+    nodes = [Node(i) for i in range(num_nodes)]
+    rng = random.Random(seed)
+    start_nodes = [rng.choice(nodes) for _ in range(num_planes)]
+
+    reference = ReferenceSimulation(
+        nodes, [ReferencePlane(node) for node in start_nodes], random.Random(seed)
+    )
+    reference.simulate(steps)
+    simulation = BasicSimulation(
+        nodes,
+        [Plane(node) for node in start_nodes],
+        archive=TripLog(),
+        rng=random.Random(seed),
+    )
+    simulation.simulate(steps)
+    return reference, simulation
+
+
+class TestSimulation:
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    @pytest.mark.parametrize("num_nodes,num_planes", [(50, 10), (5, 3), (10, 40)])
+    def test_matches_reference(self, seed, num_nodes, num_planes):
+        reference, simulation = run_both(seed, num_nodes, num_planes, 300)
+        trips = sorted(
+            [*simulation.archive, *simulation.trips.values()], key=lambda t: t.id
+        )
+        assert [trip_tuple(t) for t in trips] == [
+            trip_tuple(t) for t in reference.trips
+        ]
+        assert [p.curr_node for p in simulation.planes] == [
+            p.curr_node for p in reference.planes
+        ]
+
+    def test_live_trips(self):
+        _, simulation = run_both(0, 10, 5, 200)
+        assert all(
+            trip.end_time is None or trip.end_time >= 200
+            for trip in simulation.trips.values()
+        )
+        assert len(simulation.archive) + len(simulation.trips) == simulation.num_trips
+
+    def test_bookkeeping_is_internal(self):
+        nodes = [Node(i) for i in range(3)]
+        with pytest.raises(TypeError):
+            BasicSimulation(nodes, [Plane(nodes[0])], pending={})
+        simulation = BasicSimulation(nodes, [Plane(nodes[0])])
+        simulation.simulate(20)
+        assert "events" not in repr(simulation)
+        assert "idle_at" not in repr(simulation)
+
+    def test_jumps_to_events(self):
+        nodes = [Node(i) for i in range(3)]
+
+        class Scheduled(BasicSimulation):
+            def request_trips(self):
+                pass
+
+            def move_planes(self):
+                pass
+
+            def next_request_time(self):
+                return None
+
+        simulation = Scheduled(nodes, [Plane(nodes[0])], archive=TripLog())
+        simulation.schedule_trip(100, nodes[0], nodes[1], real=True)
+        simulation.schedule_trip(100, nodes[1], nodes[2], real=True)
+        visited = []
+        assign_trips = simulation.assign_trips
+        simulation.assign_trips = lambda: (
+            visited.append(simulation.curr_time),
+            assign_trips(),
+        )
+        simulation.simulate(10**9)
+        assert visited == [0, 100, 105, 106, 111, 112]
+        assert [(t.start_time, t.end_time) for t in simulation.archive] == [
+            (100, 105),
+            (106, 111),
+        ]
+        assert simulation.curr_time == 10**9
+
+    def test_landed_planes_take_waiting_trips(self):
+        nodes = [Node(i) for i in range(3)]
+
+        class Scheduled(BasicSimulation):
+            def request_trips(self):
+                pass
+
+            def move_planes(self):
+                pass
+
+            def next_request_time(self):
+                return None
+
+        simulation = Scheduled(nodes, [Plane(nodes[0])], archive=TripLog())
+        simulation.request_trip(nodes[0], nodes[1], real=True)
+        simulation.schedule_trip(2, nodes[1], nodes[2], real=True)
+        simulation.schedule_trip(100, nodes[2], nodes[0], real=True)
+        simulation.simulate(200)
+        # the plane lands at node 1 at t=5 with nothing else due until t=100,
+        # and takes the trip waiting there on the next tick
+        assert [(t.start_time, t.end_time) for t in simulation.archive] == [
+            (0, 5),
+            (6, 11),
+            (100, 105),
+        ]
+
+    def test_random_seed(self):
+        runs = []
+        for _ in range(2):
+            random.seed(7)
+            nodes = [Node(i) for i in range(10)]
+            planes = [Plane(random.choice(nodes)) for _ in range(4)]
+            simulation = BasicSimulation(nodes, planes, archive=TripLog())
+            simulation.simulate(100)
+            runs.append([trip_tuple(t) for t in simulation.archive])
+        assert runs[0] == runs[1]
+
+
+class CheckedSimulation(BasicSimulation):
+    """
+    checks the per node indexes against a full scan after every assign_trips
+    """
+
+    def assign_trips(self):
+        super().assign_trips()
+        idle_at = defaultdict(set)
+        for i, plane in enumerate(self.planes):
+            if plane.curr_trip is None:
+                idle_at[plane.curr_node.id].add(i)
+        assert self.idle == set().union(*idle_at.values())
+        assert {k: v for k, v in self.idle_at.items() if v} == idle_at
+
+        pending = [trip for trip in self.trips.values() if trip.pending()]
+        assert list(self.pending.values()) == pending
+        for node_id, queue in self.queues.items():
+            queued = [trip for trip in queue if trip.pending()]
+            assert queued == [trip for trip in pending if trip.start.id == node_id]
+            # a pending trip and an idle plane never wait at the same node
+            assert not (queued and idle_at[node_id])
+
+
+class TestIndexes:
+    @pytest.mark.parametrize("num_nodes,num_planes", [(50, 10), (5, 3), (10, 40)])
+    def test_invariants(self, num_nodes, num_planes):
+        rng = random.Random(num_nodes)
+        nodes = [Node(i) for i in range(num_nodes)]
+        planes = [Plane(rng.choice(nodes)) for _ in range(num_planes)]
+        CheckedSimulation(nodes, planes, rng=rng).simulate(200)
+
+    def test_oldest_trip_takes_first_plane(self):
+        nodes = [Node(i) for i in range(3)]
+        planes = [Plane(nodes[1]), Plane(nodes[0]), Plane(nodes[0])]
+        simulation = CheckedSimulation(nodes, planes, archive=TripLog())
+        simulation.request_trip(nodes[2], nodes[1], real=True)
+        first = simulation.request_trip(nodes[0], nodes[1], real=True)
+        second = simulation.request_trip(nodes[0], nodes[2], real=True)
+        third = simulation.request_trip(nodes[0], nodes[2], real=True)
+        simulation.assign_trips()
+        assert first.assigned_plane is planes[1]
+        assert second.assigned_plane is planes[2]
+        assert third.pending()
+        assert list(simulation.pending) == [0, third.id]
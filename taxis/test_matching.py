@@ -0,0 +1,95 @@
+import itertools
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from main import Node, Plane  # noqa: E402
+from matching import (  # noqa: E402
+    MatchingSimulation,
+    NearestPlaneSimulation,
+    min_cost_assignment,
+)
+from network import Network  # noqa: E402
+
+
+def brute_force_cost(cost):
+    """
+    cheapest total over every way of pairing min(rows, columns) rows and columns
+    """
+    num_rows, num_columns = cost.shape
+    if num_rows > num_columns:
+        return brute_force_cost(cost.T)
+    return min(
+        sum(cost[row, column] for row, column in enumerate(columns))
+        for columns in itertools.permutations(range(num_columns), num_rows)
+    )
+
+
+class TestMinCostAssignment:
+    @pytest.mark.parametrize(
+        "shape",
+        [(1, 1), (1, 4), (4, 1), (3, 3), (2, 5), (5, 2), (4, 6), (6, 4), (5, 5)],
+    )
+    @pytest.mark.parametrize("seed", range(5))
+    def test_brute_force(self, shape, seed):
+        rng = np.random.default_rng(seed)
+        # small integers for ties, and negative costs as wait_weight gives
+        for cost in (rng.integers(-3, 4, shape), rng.normal(size=shape)):
+            rows = min_cost_assignment(cost.astype(float))
+            assert rows.shape == (shape[0],)
+            assigned = rows[rows >= 0]
+            assert len(assigned) == min(shape)
+            assert len(set(assigned.tolist())) == len(assigned)
+            total = sum(
+                cost[row, column] for row, column in enumerate(rows) if column >= 0
+            )
+            assert total == pytest.approx(brute_force_cost(cost))
+
+    def test_empty(self):
+        assert min_cost_assignment(np.zeros((0, 3))).tolist() == []
+        assert min_cost_assignment(np.zeros((2, 0))).tolist() == [-1, -1]
+
+
+class TestMatchingSimulation:
+    def test_inbound_is_internal(self):
+        nodes = [Node(i) for i in range(2)]
+        with pytest.raises(TypeError):
+            MatchingSimulation(nodes, [Plane(nodes[0])], inbound={})
+        simulation = MatchingSimulation(nodes, [Plane(nodes[0])], wait_weight=2.0)
+        assert "inbound" not in repr(simulation)
+        assert "wait_weight=2.0" in repr(simulation)
+
+    @pytest.mark.parametrize("strategy", [MatchingSimulation, NearestPlaneSimulation])
+    def test_local_plane_before_inbound(self, strategy):
+        nodes = [Node(i) for i in range(3)]
+        network = Network(3, [(0, 1, 6), (1, 2, 3), (0, 2, 6)])
+        plane_a, plane_b = Plane(nodes[0]), Plane(nodes[2])
+
+        class Scheduled(strategy):
+            def request_trips(self):
+                pass
+
+        simulation = Scheduled(nodes, [plane_a, plane_b], network=network)
+        simulation.schedule_trip(2, nodes[2], nodes[1], real=True)
+        simulation.schedule_trip(2, nodes[1], nodes[2], real=True)
+        simulation.schedule_trip(4, nodes[0], nodes[2], real=True)
+
+        simulation.simulate(3)
+        to_node_1, trip_1 = sorted(simulation.trips.values(), key=lambda t: t.id)[:2]
+        # B lands at node 1 at t=5 and A flies to trip 1, landing at t=8
+        assert to_node_1.assigned_plane is plane_b and to_node_1.end_time == 5
+        assert simulation.inbound[1] == 1
+        assert plane_a.curr_trip is not None and plane_a.curr_trip.end_time == 8
+
+        simulation.simulate(7)
+        # B takes trip 1 as soon as it can instead of flying off to trip 2
+        assert trip_1.assigned_plane is plane_b
+        assert trip_1.start_time == 6
+        trip_2 = next(t for t in simulation.trips.values() if t.request_time == 4)
+        assert trip_2.pending()
+
+        simulation.simulate(30)
+        assert trip_2.assigned_plane is plane_a
+        assert not simulation.pending
+        assert simulation.inbound[1] == 0
@@ -0,0 +1,161 @@
+import math
+import random
+
+import pytest
+from main import BasicSimulation, Node, Plane
+from metrics import MetricsCollector, QuantileSketch, RunningMean
+
+try:
+    import numpy as np
+    from archive import TripArchive
+except ImportError:
+    np = None
+
+NUM_PLANES = 10
+NUM_STEPS = 2000
+
+
+def run(seed, window=None):
+    rng = random.Random(seed)
+    nodes = [Node(i) for i in range(20)]
+    planes = [Plane(rng.choice(nodes)) for _ in range(NUM_PLANES)]
+    metrics = MetricsCollector(window=window)
+    archive = TripArchive(chunk_size=256)
+    simulation = BasicSimulation(
+        nodes, planes, archive=archive, metrics=metrics, rng=rng
+    )
+    simulation.simulate(NUM_STEPS)
+    return simulation, metrics
+
+
+def assigned(simulation):
+    """
+    columns of every trip that got a plane, completed or still in the air
+    """
+    archive = simulation.archive
+    flying = [t for t in simulation.trips.values() if not t.pending()]
+    return {
+        "real": np.concatenate([archive.column("real"), [t.real for t in flying]]),
+        "wait": np.concatenate(
+            [
+                archive.column("start_time") - archive.column("request_time"),
+                [t.start_time - t.request_time for t in flying],
+            ]
+        ),
+        "busy": np.concatenate(
+            [
+                archive.column("end_time") - archive.column("start_time"),
+                [min(t.end_time, NUM_STEPS) - t.start_time for t in flying],
+            ]
+        ),
+    }
+
+
+def assert_quantiles(metrics, waits):
+    waits = np.sort(waits)
+    accuracy = metrics.relative_accuracy
+    for q, value in metrics.summary().quantile_waits.items():
+        exact = waits[math.floor(q * (len(waits) - 1))]
+        assert value == pytest.approx(exact, rel=accuracy, abs=1e-9)
+
+
+@pytest.mark.skipif(np is None, reason="checked against a TripArchive, needs numpy")
+class TestMetricsCollector:
+    @pytest.mark.parametrize("seed", [0, 1])
+    def test_matches_archive(self, seed):
+        simulation, metrics = run(seed)
+        columns = assigned(simulation)
+        waits = columns["wait"][columns["real"]]
+        summary = metrics.summary()
+        assert summary.end == NUM_STEPS
+        assert summary.trips == len(waits)
+        assert summary.mean_wait == pytest.approx(waits.mean())
+        assert_quantiles(metrics, waits)
+
+        idle_time = NUM_PLANES * NUM_STEPS - columns["busy"].sum()
+        assert summary.idle_time == idle_time
+        assert sum(metrics.plane_idle_times(NUM_STEPS)) == idle_time
+
+    def test_windows(self):
+        _, metrics = run(0, window=300)
+        summary = metrics.summary()
+        assert [(s.start, s.end) for s in metrics.snapshots] == [
+            (start, start + 300) for start in range(0, NUM_STEPS - 300 + 1, 300)
+        ]
+        trips = sum(s.trips for s in metrics.snapshots)
+        idle_time = sum(s.idle_time for s in metrics.snapshots)
+        # the partial window at the end is only in the summary
+        assert trips <= summary.trips
+        assert idle_time <= summary.idle_time
+        assert idle_time + metrics._window_idle_time == summary.idle_time
+        assert trips + metrics._window_wait.mean.count == summary.trips
+
+    def test_merge(self):
+        runs = [run(seed) for seed in range(3)]
+        waits = []
+        for simulation, _ in runs:
+            columns = assigned(simulation)
+            waits.append(columns["wait"][columns["real"]])
+        waits = np.concatenate(waits)
+        idle_time = sum(metrics.idle_time for _, metrics in runs)
+
+        merged = runs[0][1]
+        for _, metrics in runs[1:]:
+            merged.merge(metrics)
+        summary = merged.summary()
+        assert summary.trips == len(waits)
+        assert summary.mean_wait == pytest.approx(waits.mean())
+        assert_quantiles(merged, waits)
+        assert summary.idle_time == idle_time
+
+
+class TestRunningMean:
+    def test_merge(self):
+        values = [random.Random(0).uniform(0, 100) for _ in range(50)]
+        left, right, whole = RunningMean(), RunningMean(), RunningMean()
+        for i, value in enumerate(values):
+            (left if i < 20 else right).add(value)
+            whole.add(value)
+        left.merge(right)
+        left.merge(RunningMean())
+        assert left.count == whole.count == 50
+        assert left.mean == pytest.approx(sum(values) / 50)
+
+
+class TestQuantileSketch:
+    def test_accuracy(self):
+        rng = random.Random(0)
+        values = sorted([rng.expovariate(0.01) for _ in range(5000)] + [0] * 100)
+        sketch = QuantileSketch(relative_accuracy=0.02)
+        for value in values:
+            sketch.add(value)
+        for q in (0, 0.01, 0.25, 0.5, 0.9, 0.99, 1):
+            exact = values[math.floor(q * (len(values) - 1))]
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.02)
+        assert QuantileSketch().quantile(0.5) is None
+
+    def test_merge(self):
+        rng = random.Random(1)
+        values = [rng.randrange(1000) for _ in range(1000)]
+        left, right, whole = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for i, value in enumerate(values):
+            (left if i % 3 else right).add(value)
+            whole.add(value)
+        left.merge(right)
+        assert left.buckets == whole.buckets
+        assert (left.count, left.zero_count, left.min, left.max) == (
+            whole.count,
+            whole.zero_count,
+            whole.min,
+            whole.max,
+        )
+
+    def test_collapse_keeps_high_quantiles(self):
+        sketch = QuantileSketch(max_buckets=16)
+        values = [1.1**i for i in range(200)]
+        for value in values:
+            sketch.add(value)
+        assert len(sketch.buckets) == 16
+        assert sketch.quantile(0.99) == pytest.approx(
+            values[math.floor(0.99 * 199)], rel=0.01
+        )
@@ -0,0 +1,67 @@
+import math
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from main import BasicSimulation, Node, Plane  # noqa: E402
+from network import Network  # noqa: E402
+
+
+class TestNetwork:
+    def test_shorter_path_than_edge(self):
+        network = Network(4, [(0, 1, 10), (0, 2, 3), (2, 1, 4), (1, 3, 1)])
+        assert network.travel_time(0, 1) == 7
+        assert network.travel_time(1, 0) == 7
+        assert network.travel_time(0, 3) == 8
+        assert network.travel_times.dtype == np.int64
+        assert network.submatrix([0, 3], [1, 2]).tolist() == [[7, 3], [1, 5]]
+
+    def test_directed(self):
+        network = Network(3, [(0, 1, 2), (1, 2, 2), (2, 0, 2)], directed=True)
+        assert network.travel_time(0, 2) == 4
+        assert network.travel_time(2, 0) == 2
+
+    def test_parallel_edges(self):
+        assert Network(2, [(0, 1, 5), (1, 0, 2), (0, 1, 3)]).travel_time(0, 1) == 2
+
+    def test_disconnected(self):
+        with pytest.raises(ValueError, match="reachable"):
+            Network(4, [(0, 1, 1), (2, 3, 1)])
+        with pytest.raises(ValueError, match="reachable"):
+            Network(2, [(0, 1, 1)], directed=True)
+
+    @pytest.mark.parametrize("time", [-1, 1.5, math.inf, math.nan])
+    def test_invalid_times(self, time):
+        with pytest.raises(ValueError, match="non-negative integer"):
+            Network(2, [(0, 1, time)])
+        with pytest.raises(ValueError, match="non-negative integer"):
+            Network(2, [(0, 1, 1)], self_travel_time=time)
+
+    @pytest.mark.parametrize("edge", [(0, 2, 1), (-1, 0, 1)])
+    def test_invalid_nodes(self, edge):
+        with pytest.raises(ValueError, match="out of range"):
+            Network(2, [(0, 1, 1), edge])
+
+    def test_integral_floats(self):
+        assert Network(2, [(0, 1, 3.0)]).travel_time(0, 1) == 3
+
+    def test_self_travel_time(self):
+        assert Network(2, [(0, 1, 3)]).travel_time(1, 1) == 0
+        assert Network(2, [(0, 1, 3)], self_travel_time=2).travel_time(1, 1) == 2
+        assert Network.uniform(3, 4).travel_times.tolist() == [[4] * 3] * 3
+
+    def test_uniform_matches_travel_time(self):
+        runs = []
+        for network in (None, Network.uniform(10, 5)):
+            rng = random.Random(0)
+            nodes = [Node(i) for i in range(10)]
+            planes = [Plane(rng.choice(nodes)) for _ in range(4)]
+            archive = []
+            simulation = BasicSimulation(
+                nodes, planes, archive=archive, travel_time=5, network=network, rng=rng
+            )
+            simulation.simulate(300)
+            runs.append([(t.id, t.start_time, t.end_time) for t in archive])
+        assert runs[0] == runs[1]
@@ -0,0 +1,100 @@
+import json
+import random
+
+import pytest
+from main import BasicSimulation, Node, Plane
+from profiler import PHASES, Profiler
+
+
+class Visited(BasicSimulation):
+    """
+    records every tick the loop visits
+    """
+
+    def __post_init__(self):
+        super().__post_init__()
+        self.visited = []
+
+    def request_arrivals(self):
+        self.visited.append(self.curr_time)
+        super().request_arrivals()
+
+
+class Waiting(Visited):
+    """
+    planes wait where they land, so the loop can jump over quiet ticks
+    """
+
+    def move_planes(self):
+        pass
+
+
+def run(profiler=None, demand=None, steps=2000, strategy=Visited):
+    rng = random.Random(0)
+    nodes = [Node(i) for i in range(10)]
+    planes = [Plane(rng.choice(nodes)) for _ in range(4)]
+    simulation = strategy(
+        nodes, planes, archive=[], rng=rng, demand=demand, profiler=profiler
+    )
+    simulation.simulate(steps)
+    trips = sorted(
+        [*simulation.archive, *simulation.trips.values()], key=lambda t: t.id
+    )
+    return simulation, [
+        (t.id, t.start.id, t.end.id, t.request_time, t.start_time, t.end_time)
+        for t in trips
+    ]
+
+
+def sparse_demand():
+    """
+    bursts of requests with long quiet gaps between them
+    """
+    rng = random.Random(1)
+    time = 0
+    for _ in range(40):
+        time += rng.choice([1, 2, 300, 2500])
+        for _ in range(rng.randrange(1, 4)):
+            yield time, rng.randrange(10), rng.randrange(10)
+
+
+class TestProfiler:
+    @pytest.mark.parametrize(
+        "demand,strategy",
+        [(None, Visited), (sparse_demand, Visited), (sparse_demand, Waiting)],
+    )
+    def test_results_unchanged(self, demand, strategy):
+        steps = 40_000 if demand else 2000
+        simulation, trips = run(None, demand and demand(), steps, strategy)
+        profiler = Profiler(sample_every=100)
+        profiled, profiled_trips = run(profiler, demand and demand(), steps, strategy)
+        assert profiled_trips == trips
+        assert profiled.visited == simulation.visited
+
+        assert profiler.ticks == len(simulation.visited)
+        assert all(profiler.phases[name].calls == profiler.ticks for name in PHASES)
+        assert profiler.counts == {
+            "requested": simulation.num_trips,
+            "assigned": simulation.num_trips - len(simulation.pending),
+            "completed": simulation.num_trips - len(simulation.trips),
+        }
+        assert json.loads(profiler.to_json())["ticks"] == profiler.ticks
+        assert f"{profiler.ticks} ticks" in profiler.summary()
+
+    @pytest.mark.parametrize("sample_every", [1, 100, 1000])
+    def test_samples(self, sample_every):
+        profiler = Profiler(sample_every=sample_every)
+        simulation, _ = run(profiler, sparse_demand(), 40_000, Waiting)
+        assert len(simulation.visited) < 1000
+        # the loop jumps over quiet ticks, so each window of sample_every
+        # ticks is sampled at the first tick visited in it, if any
+        first_visits = {}
+        for time in simulation.visited:
+            first_visits.setdefault(time // sample_every, time)
+        assert [sample["time"] for sample in profiler.samples] == sorted(
+            first_visits.values()
+        )
+        last = profiler.samples[-1]
+        assert last["pending"] + last["in_flight"] + last["completed"] == (
+            last["requested"]
+        )
@@ -0,0 +1,59 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from replicas import VectorizedSimulation  # noqa: E402
+
+
+class TestVectorizedSimulation:
+    @pytest.mark.parametrize(
+        "num_nodes,num_planes,requests_per_tick", [(20, 10, 1), (5, 3, 2), (10, 40, 3)]
+    )
+    def test_conservation(self, num_nodes, num_planes, requests_per_tick):
+        steps = 300
+        travel_time = 5
+        simulation = VectorizedSimulation(
+            50, num_nodes, num_planes, travel_time, requests_per_tick, seed=0
+        )
+        results = simulation.simulate(steps)
+        assert (results.served + results.pending == requests_per_tick * steps).all()
+        assert (simulation.pending >= 0).all()
+
+        # every plane tick is idle or in a flight of travel_time ticks, the
+        # last of which may run past the end
+        flights = results.served + results.repositions
+        overrun = np.maximum(simulation.busy_until - steps, 0).sum(axis=1)
+        assert (
+            results.idle_time == num_planes * steps - travel_time * flights + overrun
+        ).all()
+
+    def test_seed(self):
+        first = VectorizedSimulation(8, seed=3).simulate(200)
+        second = VectorizedSimulation(8, seed=3).simulate(200)
+        other = VectorizedSimulation(8, seed=4).simulate(200)
+        for name in ("served", "pending", "wait_time", "idle_time", "repositions"):
+            assert (getattr(first, name) == getattr(second, name)).all()
+        assert (first.wait_time != other.wait_time).any()
+
+    def test_cover_once(self):
+        simulation = VectorizedSimulation(
+            1, num_nodes=3, num_planes=2, travel_time=2, requests_per_tick=0
+        )
+        simulation.plane_node[:] = 0
+        simulation.pending[0, 1] = 1
+
+        simulation.step()
+        # one plane is sent to the request and the other stays put
+        assert simulation.plane_node[0].tolist() == [1, 0]
+        assert simulation.repositioning[0].tolist() == [True, False]
+        for _ in range(3):
+            simulation.step()
+        results = simulation.results()
+        # the request waited ticks 0 to 2 and was taken when the plane landed
+        assert results.served.tolist() == [1]
+        assert results.pending.tolist() == [0]
+        assert results.wait_time.tolist() == [3]
+        assert results.repositions.tolist() == [1]
+        assert results.mean_wait_with_pending.tolist() == [3]
+        # plane 1 idle on every tick, plane 0 on the tick it landed
+        assert results.idle_time.tolist() == [4 + 1]
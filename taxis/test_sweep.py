@@ -0,0 +1,90 @@
+import csv
+
+import pytest
+from main import BasicSimulation
+from sweep import Config, grid, load_strategy, main, run, sweep
+
+
+def without_seconds(rows):
+    return [{k: v for k, v in row.items() if k != "seconds"} for row in rows]
+
+
+def by_config(rows):
+    return sorted(rows, key=lambda row: (row["num_nodes"], row["num_planes"]))
+
+
+class TestSweep:
+    def test_grid(self):
+        configs = grid([BasicSimulation], [5, 10], [2, 3, 4], [5], [100])
+        assert len(configs) == 6
+        assert configs[0] == Config(BasicSimulation, 5, 2, 5, 100)
+        assert configs[-1] == Config(BasicSimulation, 10, 4, 5, 100)
+
+    def test_rows(self):
+        config = Config(BasicSimulation, 5, 2, 5, 200)
+        rows = list(sweep([config], seeds=3, base_seed=1))
+        assert len(rows) == 1
+        row = rows[0]
+        assert row["strategy"] == "main.BasicSimulation"
+        assert row["runs"] == 3
+        # runs are merged, and run j uses seed "base_seed:j"
+        runs = [run(config, f"1:{j}")[0].summary() for j in range(3)]
+        assert row["trips"] == sum(summary.trips for summary in runs)
+        idle_time = sum(summary.idle_time for summary in runs)
+        assert row["idle_fraction"] == idle_time / (2 * 200 * 3)
+        assert {"wait_p50", "wait_p90", "wait_p99", "mean_wait"} <= row.keys()
+
+    def test_workers(self):
+        configs = grid([BasicSimulation], [5, 8], [2, 3], num_steps=[200])
+        serial = list(sweep(configs, seeds=2))
+        parallel = list(sweep(configs, seeds=2, workers=2))
+        assert len(serial) == len(parallel) == 4
+        assert by_config(without_seconds(parallel)) == by_config(
+            without_seconds(serial)
+        )
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_csv(self, tmp_path, workers):
+        path = str(tmp_path / "sweep.csv")
+        argv = ["-o", path, "--nodes", "5", "8", "--planes", "2", "3"]
+        argv += ["--steps", "100", "--seeds", "2", "--workers", str(workers)]
+        assert main(argv) == 0
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 4
+        assert list(rows[0]) == [
+            "strategy",
+            "num_nodes",
+            "num_planes",
+            "travel_time",
+            "num_steps",
+            "runs",
+            "trips",
+            "mean_wait",
+            "wait_p50",
+            "wait_p90",
+            "wait_p99",
+            "idle_fraction",
+            "seconds",
+        ]
+        assert {(row["num_nodes"], row["num_planes"]) for row in rows} == {
+            ("5", "2"),
+            ("5", "3"),
+            ("8", "2"),
+            ("8", "3"),
+        }
+        assert all(row["runs"] == "2" for row in rows)
+
+    def test_parquet(self, tmp_path):
+        parquet = pytest.importorskip("pyarrow.parquet")
+        path = str(tmp_path / "sweep.parquet")
+        assert main(["-o", path, "--planes", "2", "3", "--steps", "100"]) == 0
+        assert parquet.read_table(path).num_rows == 2
+
+    def test_load_strategy(self):
+        assert load_strategy("main.BasicSimulation") is BasicSimulation
+        assert load_strategy("BasicSimulation") is BasicSimulation
+        pytest.importorskip("numpy")
+        from matching import MatchingSimulation
+
+        assert load_strategy("matching.MatchingSimulation") is MatchingSimulation